@@ -9,11 +9,11 @@ Sources:
         https://github.com/victronenergy/dbus-mqtt
 """
 
+import asyncio
 import contextlib
 from datetime import timedelta
 import json
 import logging
-import re
 
 from homeassistant.components import mqtt
 from homeassistant.components.mqtt import (
@@ -22,14 +22,58 @@ from homeassistant.components.mqtt import (
     async_subscribe_connection_status,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.util.json import json_loads
 
-from .const import DOMAIN, TOPICS
+from .const import DOMAIN, TOPIC_ITEMS
 from .manager import PVWaterHeatingManager
 
 _LOGGER = logging.getLogger(__name__)
 
+# Default values of the necessary variables for the component (stored in hass.data, immutable values only)
+_DATA_DEFAULTS = {
+    "cancel_venus_keepalive": None,  # Cancel the keepalive task
+    "cancel_grid_lost_handler": None,  # Cancel the grid lost handler task
+    "pv_forecast_cancel": None,  # Cancel the forecast update task (midnight updates)
+    "discovery_published": False,  # Used to check if the discovery config was published
+    "mqtt_timer_event": None,  # Cancel the MQTT timer event (If MQTT connection is lost longer than 30 seconds)
+    "manager_last_state": None,  # Store the last state of the manager
+    "night_heating_event": None,  # Cancel the night heating event
+    "night_heating_calc_event": None,  # Cancel the night heating calculation event
+    "night_heating_planned": False,  # Used to check if night heating is planned
+    "night_heating_calc_planned": False,  # Used to check if night heating calculation is planned
+    "night_heating_canceled": False,  # Used when there is not enough excess PV (AUTOMATIC mode)
+    "night_preheating": False,  # Used to check if night pre-heating is active
+    "component_loading": True,  # Used to check if the component is loading
+    "boiler_power_on": False,  # Used to check if the boiler is on
+}
+
+# Keepalive message payload, topics which should be published by Venus MQTT broker
+_KEEPALIVE_PAYLOAD = json.dumps(
+    [
+        "system/+/Ac/Grid/+/Power",
+        "system/+/Ac/ConsumptionOnInput/+/Power",
+        "system/+/Ac/ConsumptionOnOutput/+/Power",
+        "system/+/Dc/Pv/Power",
+        "system/+/SystemState/State",
+        "battery/+/Dc/+/Power",
+        "battery/+/Soc",
+        "settings/+/Settings/CGwacs/BatteryLife/State",
+        "vebus/+/Alarms/GridLost",
+    ]
+)
+
+# Topic paths by the sensor type (formatted with the Venus MQTT topic and the topic)
+_TOPIC_PATHS = {
+    "system": "N/{}/system/+/{}",
+    "critical_load": "N/{}/system/+/{}/+/Power",
+    "battery_ess": "N/{}/settings/+/{}",
+    "battery_power": "N/{}/battery/+/Dc/+/{}",
+    "battery_soc": "N/{}/battery/+/{}",
+    "grid_lost": "N/{}/vebus/+/{}",
+}
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up platform from a config entry, so user can add component from GUI."""
@@ -38,38 +82,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     # Store some default values in hass.data
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = entry.data
 
     # Necessary variables for the component
-    hass.data[DOMAIN]["cancel_venus_keepalive"] = None  # Cancel the keepalive task
-    hass.data[DOMAIN]["cancel_grid_lost_handler"] = None  # Cancel the grid lost handler task
-    hass.data[DOMAIN]["pv_forecast_today_cancel"] = None  # Cancel the today's forecast update task (midnight updates)
-    hass.data[DOMAIN][
-        "pv_forecast_tomorrow_cancel"
-    ] = None  # Cancel the tomorrow's forecast update task (midnight updates)
+    hass.data[DOMAIN].update(_DATA_DEFAULTS)
+    hass.data[DOMAIN][entry.entry_id] = entry.data
     hass.data[DOMAIN]["mqtt_subscriptions"] = []  # Store the MQTT subscriptions (So we can unsubscribe later)
-    hass.data[DOMAIN][
-        "mqtt_timer_event"
-    ] = None  # Cancel the MQTT timer event (If MQTT connection is lost longer than 30 seconds)
-    hass.data[DOMAIN]["manager_last_state"] = None  # Store the last state of the manager
     hass.data[DOMAIN]["mqtt_connected"] = mqtt.is_connected(hass)  # Tracking MQTT connection status
 
-    hass.data[DOMAIN]["night_heating_event"] = None  # Cancel the night heating event
-    hass.data[DOMAIN]["night_heating_calc_event"] = None  # Cancel the night heating calculation event
-    hass.data[DOMAIN]["night_heating_planned"] = False  # Used to check if night heating is planned
-    hass.data[DOMAIN]["night_heating_calc_planned"] = False  # Used to check if night heating calculation is planned
-    hass.data[DOMAIN]["night_heating_canceled"] = False  # Used when there is not enough excess PV (AUTOMATIC mode)
-    hass.data[DOMAIN]["night_preheating"] = False  # Used to check if night pre-heating is active
-    hass.data[DOMAIN]["component_loading"] = True  # Used to check if the component is loading
-    hass.data[DOMAIN]["boiler_power_on"] = False  # Used to check if the boiler is on
-
     # Set up the PV Water Heating Manager (Manager updates every x seconds - defined by the user)
     # Defined in select.py, under _set_state method, when manager is turned on
     manager = PVWaterHeatingManager(hass, entry)
     hass.data[DOMAIN]["manager"] = manager
 
-    # Forward the setup to the sensor platform.
-    await hass.config_entries.async_forward_entry_setup(entry, "sensor")
+    # Forward the setup to the sensor platform (other platforms use the manager status sensor, so it is set up first)
+    await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
 
     # Set the status of the manager to "Initializing"
     hass.data[DOMAIN]["manager_status_sensor"].set_state("Initializing")
@@ -93,12 +119,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             # Set up a recurring task to publish a keepalive message to Venus MQTT broker.
             # Source: https://community.home-assistant.io/t/custom-component-how-to-implement-scan-interval/385749/5
             hass.data[DOMAIN]["cancel_venus_keepalive"] = async_track_time_interval(
-                hass, lambda now: hass.create_task(async_publish_venus_keepalive(hass, entry)), timedelta(seconds=30)
+                hass, mqtt_handler.async_venus_keepalive, timedelta(seconds=30)
             )
         else:
             hass.data[DOMAIN]["manager_status_sensor"].set_state("Off - Warning (MQTT connection lost)")
 
-        async_subscribe_connection_status(hass, mqtt_handler.async_mqtt_connection_changed)
+        hass.data[DOMAIN]["cancel_connection_status"] = async_subscribe_connection_status(
+            hass, mqtt_handler.async_mqtt_connection_changed
+        )
 
     _LOGGER.debug("PV Water Heating Manager component started.")
 
@@ -114,34 +142,22 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Manager cancels grid lost handler, night heating, night heating calculation and stop manager updates
     await hass.data[DOMAIN]["manager_status_select"].async_select_option("Off")
 
-    # Cancel the today's forecast update task
-    with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-        hass.data[DOMAIN]["pv_forecast_today_cancel"]()
-        hass.data[DOMAIN].pop("pv_forecast_today_cancel")
-
-    # Cancel the tomorrow's forecast update task
-    with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-        hass.data[DOMAIN]["pv_forecast_tomorrow_cancel"]()
-        hass.data[DOMAIN].pop("pv_forecast_tomorrow_cancel")
+    # Cancel the forecast update task
+    _cancel(hass.data[DOMAIN], "pv_forecast_cancel")
 
     if entry.data["solar_conf_mode"] == "automatic":
         # Stop the recurring task to publish a keepalive message to Venus MQTT broker.
-        with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-            hass.data[DOMAIN]["cancel_venus_keepalive"]()
-            hass.data[DOMAIN].pop("cancel_venus_keepalive")
+        _cancel(hass.data[DOMAIN], "cancel_venus_keepalive")
+
+        # Stop listening to the MQTT connection status
+        _cancel(hass.data[DOMAIN], "cancel_connection_status")
 
         # Unsubscribe from all the topics
-        for unsub in hass.data[DOMAIN]["mqtt_subscriptions"]:
-            with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-                unsub()
-        hass.data[DOMAIN].pop("mqtt_subscriptions")
+        for unsub in hass.data[DOMAIN].pop("mqtt_subscriptions", ()):
+            unsub()
 
     # Unload entities
-    await hass.config_entries.async_forward_entry_unload(entry, "select")
-    await hass.config_entries.async_forward_entry_unload(entry, "switch")
-    await hass.config_entries.async_forward_entry_unload(entry, "time")
-    await hass.config_entries.async_forward_entry_unload(entry, "number")
-    await hass.config_entries.async_forward_entry_unload(entry, "sensor")
+    await hass.config_entries.async_unload_platforms(entry, ["select", "switch", "time", "number", "sensor"])
 
     # Remove the data from hass.data
     hass.data[DOMAIN].clear()
@@ -151,6 +167,32 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+def _phase_from_topic(topic: str) -> str | None:
+    """Get the home phase from the critical load topic 'N/xxxx/system/x/Ac/ConsumptionOnOutput/<Phase>/Power'.
+
+    Returns:
+        Phase number as a string, None if the topic is not a critical load topic
+
+    """
+
+    parts = topic.split("/")
+    if len(parts) != 8 or parts[4:6] != ["Ac", "ConsumptionOnOutput"] or parts[7] != "Power":
+        return None
+
+    phase = parts[6]
+    if len(phase) == 2 and phase[0] == "L" and phase[1].isdigit():
+        return phase[1]
+    return None
+
+
+def _cancel(data: dict, key: str) -> None:
+    """Remove the cancel callback stored under the key and call it (if it is set)."""
+
+    cancel = data.pop(key, None)
+    if cancel is not None:
+        cancel()
+
+
 async def async_setup_mqtt_listeners_and_sensors(hass: HomeAssistant, entry: ConfigEntry, handler) -> None:
     """Set up MQTT listeners and publish discovery config for sensors.
 
@@ -163,13 +205,15 @@ async def async_setup_mqtt_listeners_and_sensors(hass: HomeAssistant, entry: Con
             https://github.com/home-assistant/example-custom-config/blob/master/custom_components/mqtt_basic_async/__init__.py
     """
 
-    _LOGGER.debug("Setting up MQTT listeners and publishing discovery config for sensors.")
+    # Subscriptions and discovery config are already set up (explicit rebuild resets "discovery_published" first)
+    if hass.data[DOMAIN]["discovery_published"] and hass.data[DOMAIN]["mqtt_subscriptions"]:
+        _LOGGER.debug("MQTT listeners and discovery config are already set up.")
+        return
 
-    updated_entry_data = {**entry.data}
+    _LOGGER.debug("Setting up MQTT listeners and publishing discovery config for sensors.")
 
-    # Set phase to None, because it is not known yet
-    if "phase" not in updated_entry_data:
-        updated_entry_data["phase"] = None
+    # Entity IDs of the discovered sensors, written to the entry data once at the end
+    discovered_entry_data = {}
 
     # Subscribe to the topics only if there are no subscriptions yet
     subscribe = False
@@ -183,31 +227,26 @@ async def async_setup_mqtt_listeners_and_sensors(hass: HomeAssistant, entry: Con
         hass.data[DOMAIN]["mqtt_subscriptions"].clear()
         subscribe = True
 
+    venus_mqtt_topic = entry.data["venus_mqtt_topic"]
+
+    # Subscriptions and discovery messages are collected and sent concurrently after the loop
+    subscriptions = []
+    discovery_messages = []
+
     # Subscribe to all the topics and publish the discovery config for each sensor, based on the config data.
-    for idx, (topic, sensor_config) in enumerate(TOPICS.items()):
+    for idx, (topic, sensor_config) in enumerate(TOPIC_ITEMS):
         if subscribe:
             _LOGGER.debug("Subscribing to topic: %s", topic)
 
             # Add topic path based on sensor type
-            if sensor_config["type"] == "system":
-                topic = f"N/{entry.data["venus_mqtt_topic"]}/system/+/{topic}"
-            elif sensor_config["type"] == "critical_load":
-                topic = f"N/{entry.data["venus_mqtt_topic"]}/system/+/{topic}/+/Power"
-            elif sensor_config["type"] == "battery_ess":
-                topic = f"N/{entry.data["venus_mqtt_topic"]}/settings/+/{topic}"
-            elif sensor_config["type"] == "battery_power":
-                topic = f"N/{entry.data["venus_mqtt_topic"]}/battery/+/Dc/+/{topic}"
-            elif sensor_config["type"] == "battery_soc":
-                topic = f"N/{entry.data["venus_mqtt_topic"]}/battery/+/{topic}"
-            elif sensor_config["type"] == "grid_lost":
-                topic = f"N/{entry.data["venus_mqtt_topic"]}/vebus/+/{topic}"
-            else:
+            topic_path = _TOPIC_PATHS.get(sensor_config["type"])
+            if topic_path is None:
                 _LOGGER.error("Unknown sensor type: %s", sensor_config["type"])
                 continue
+            topic = topic_path.format(venus_mqtt_topic, topic)
 
-            # Subscribe to the topic and add the subscription to the hass.data
-            sub = await async_subscribe(hass, topic, handler.async_mqtt_message_received)
-            hass.data[DOMAIN]["mqtt_subscriptions"].append(sub)
+            # Subscribe to the topic
+            subscriptions.append(async_subscribe(hass, topic, handler.async_mqtt_message_received))
 
         # Add necessary information to the sensor config
         sensor_id = f"pvwhc_{idx}"
@@ -240,15 +279,24 @@ async def async_setup_mqtt_listeners_and_sensors(hass: HomeAssistant, entry: Con
             }
 
         # Add sensor id to the config
-        updated_entry_data[sensor_config["name"].replace(" ", "_").lower()] = (
-            "sensor.venus_" + sensor_config["name"].replace(" ", "_").lower()
-        )
+        sensor_key = sensor_config["name"].replace(" ", "_").lower()
+        discovered_entry_data[sensor_key] = f"sensor.venus_{sensor_key}"
+
+        # Discovery message for the sensor
+        discovery_messages.append((discovery_topic, json.dumps(sensor_config)))
 
-        # Publish the discovery message for the sensor
-        await async_publish(hass, discovery_topic, json.dumps(sensor_config))
+    # Subscribe to the topics and add the subscriptions to the hass.data
+    hass.data[DOMAIN]["mqtt_subscriptions"].extend(await asyncio.gather(*subscriptions))
+
+    # Publish the discovery messages for the sensors
+    await asyncio.gather(*(async_publish(hass, topic, payload) for topic, payload in discovery_messages))
+    hass.data[DOMAIN]["discovery_published"] = True
 
     # Update the entry data with automatically discovered sensors
-    hass.config_entries.async_update_entry(entry, data=updated_entry_data)
+    # Phase is read at write time (it may be discovered while awaiting above), set to None if it is not known yet
+    data = {**entry.data, **discovered_entry_data}
+    data.setdefault("phase", None)
+    hass.config_entries.async_update_entry(entry, data=data)
 
     _LOGGER.debug("MQTT listeners set up and discovery config published for sensors.")
 
@@ -266,69 +314,66 @@ async def async_publish_venus_keepalive(hass: HomeAssistant, entry: ConfigEntry)
         return
 
     topic = f"R/{entry.data["venus_mqtt_topic"]}/keepalive"
-    payload = json.dumps(
-        [
-            "system/+/Ac/Grid/+/Power",
-            "system/+/Ac/ConsumptionOnInput/+/Power",
-            "system/+/Ac/ConsumptionOnOutput/+/Power",
-            "system/+/Dc/Pv/Power",
-            "system/+/SystemState/State",
-            "battery/+/Dc/+/Power",
-            "battery/+/Soc",
-            "settings/+/Settings/CGwacs/BatteryLife/State",
-            "vebus/+/Alarms/GridLost",
-        ]
-    )
 
     _LOGGER.debug("Publishing Venus keepalive message.")
-    await async_publish(hass, topic, payload)
+    await async_publish(hass, topic, _KEEPALIVE_PAYLOAD)
 
 
 class MQTTMessageHandler:
     """Handler for MQTT messages."""
 
+    __slots__ = ("_hass", "_entry", "_phase")
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the MQTT message handler."""
         self._hass = hass
         self._entry = entry
+        self._phase = entry.data.get("phase")  # Home phase (kept in sync with the entry data by this handler)
+
+    async def async_venus_keepalive(self, now) -> None:
+        """Publish the recurring keepalive message to Venus MQTT broker."""
+        await async_publish_venus_keepalive(self._hass, self._entry)
 
-    @callback
     async def async_mqtt_message_received(self, message) -> None:
         """Handle incoming MQTT messages."""
 
-        # If home phase is not known yet, set it based on the received message
-        # topic 'N/xxxx/system/x/Ac/ConsumptionOnOutput/<Phase>/Power'
         with contextlib.suppress(KeyError):
-            if not self._entry.data["phase"]:
-                # Check if the message payload is not null
-                if not json.loads(message.payload)["value"]:
-                    return
+            domain_data = self._hass.data[DOMAIN]
+
+            # Nothing to do once the phase is known and the component is loaded (all but the first messages)
+            phase = self._phase
+            if phase and not domain_data["component_loading"]:
+                return
+
+            # If home phase is not known yet, set it based on the received message
+            # Topic is checked first, so the payload is parsed only for the critical load messages
+            if not phase:
+                phase = _phase_from_topic(message.topic)
+                if phase:
+                    # Check if the message payload is not null
+                    if not json_loads(message.payload)["value"]:
+                        return
 
-                match = re.search(r"system/\d+/Ac/ConsumptionOnOutput/L(\d{1})/Power", message.topic)
-                if match:
-                    updated_entry_data = {**self._entry.data}
-                    updated_entry_data["phase"] = match.group(1)
-                    self._hass.config_entries.async_update_entry(self._entry, data=updated_entry_data)
+                    self._phase = phase
+                    self._hass.config_entries.async_update_entry(self._entry, data={**self._entry.data, "phase": phase})
 
-                    _LOGGER.debug("Phase set to: %s", updated_entry_data["phase"])
+                    _LOGGER.debug("Phase set to: %s", phase)
 
             # For som reason autodiscovery is not working after restart, so call it after mqtt is fully loaded
-            if self._hass.data[DOMAIN]["component_loading"]:
-                self._hass.data[DOMAIN]["component_loading"] = False
-                await async_setup_mqtt_listeners_and_sensors(
-                    self._hass, self._entry, self._hass.data[DOMAIN]["mqtt_handler"]
-                )
+            if domain_data["component_loading"]:
+                domain_data["component_loading"] = False
+                domain_data["discovery_published"] = False
+                await async_setup_mqtt_listeners_and_sensors(self._hass, self._entry, self)
 
-    @callback
     async def async_mqtt_lost_connection(self, now) -> None:
         """Handle lost MQTT connection which lasts 30 seconds."""
 
-        await self._hass.data[DOMAIN]["manager_status_select"].async_select_option("Off")
-        self._hass.data[DOMAIN]["manager_status_sensor"].set_state("Off - Warning (MQTT connection lost)")
+        domain_data = self._hass.data[DOMAIN]
+
+        await domain_data["manager"].set_manager_state("Off", "Off - Warning (MQTT connection lost)")
 
         _LOGGER.warning("Connection to MQTT broker lost for 30 seconds - Manager set to Off.")
 
-    @callback
     async def async_mqtt_connection_changed(self, event):
         """Handle the MQTT connection status change.
 
@@ -337,53 +382,49 @@ class MQTTMessageHandler:
 
         _LOGGER.debug("MQTT connection status changed: %s", event)
 
+        # Component is already unloaded
+        domain_data = self._hass.data.get(DOMAIN)
+        if not domain_data:
+            return
+
         # Store last known state of mqtt connection
-        last_mqtt_connected = self._hass.data[DOMAIN]["mqtt_connected"]
+        last_mqtt_connected = domain_data["mqtt_connected"]
 
         # Store the connection status in hass.data
-        self._hass.data[DOMAIN]["mqtt_connected"] = event
+        domain_data["mqtt_connected"] = event
 
         # If last state was Off(False) and the connection is established(True), cancel the timer event
         if not last_mqtt_connected and event:
             _LOGGER.debug("MQTT connection established - MQTT timer canceled.")
 
             # Cancel mqtt timer event
-            with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-                self._hass.data[DOMAIN]["mqtt_timer_event"]()
+            _cancel(domain_data, "mqtt_timer_event")
 
             # Set manager status to last known state
-            if self._hass.data[DOMAIN]["manager_last_state"]:
-                await self._hass.data[DOMAIN]["manager_status_select"].async_select_option(
-                    self._hass.data[DOMAIN]["manager_last_state"]
+            manager_last_state = domain_data["manager_last_state"]
+            if manager_last_state:
+                await domain_data["manager"].set_manager_state(
+                    manager_last_state, "Off" if manager_last_state == "Off" else "Running"
                 )
 
-                if self._hass.data[DOMAIN]["manager_last_state"] == "Off":
-                    self._hass.data[DOMAIN]["manager_status_sensor"].set_state("Off")
-                else:
-                    self._hass.data[DOMAIN]["manager_status_sensor"].set_state("Running")
-
             # Subscribe to the topics and publish the discovery config for sensors (if not already done)
-            if not self._hass.data[DOMAIN]["mqtt_subscriptions"]:
+            if not domain_data["mqtt_subscriptions"]:
                 # Publish first keepalive message, so the Venus MQTT broker starts publishing the requested topics
                 await async_publish_venus_keepalive(self._hass, self._entry)
 
-                await async_setup_mqtt_listeners_and_sensors(
-                    self._hass, self._entry, self._hass.data[DOMAIN]["mqtt_handler"]
-                )
+                await async_setup_mqtt_listeners_and_sensors(self._hass, self._entry, self)
 
                 # Set up a recurring task to publish a keepalive message to Venus MQTT broker.
                 # Source: https://community.home-assistant.io/t/custom-component-how-to-implement-scan-interval/385749/5
-                self._hass.data[DOMAIN]["cancel_venus_keepalive"] = async_track_time_interval(
-                    self._hass,
-                    lambda now: self._hass.create_task(async_publish_venus_keepalive(self._hass, self._entry)),
-                    timedelta(seconds=30),
+                # Previous task is canceled first, so the keepalive is never published twice
+                _cancel(domain_data, "cancel_venus_keepalive")
+                domain_data["cancel_venus_keepalive"] = async_track_time_interval(
+                    self._hass, self.async_venus_keepalive, timedelta(seconds=30)
                 )
 
         # If last state was On(True) and the connection is lost(False), set the manager to warning and set timer event
         elif last_mqtt_connected and not event:
             # Set the status of the manager to running with mqtt warning
-            self._hass.data[DOMAIN]["manager_status_sensor"].set_state("Running - Warning (MQTT connection lost)")
-            self._hass.data[DOMAIN]["manager_last_state"] = self._hass.data[DOMAIN]["manager_status_select"].state
-            self._hass.data[DOMAIN]["mqtt_timer_event"] = async_call_later(
-                self._hass, 30, self.async_mqtt_lost_connection
-            )
+            domain_data["manager_status_sensor"].set_state("Running - Warning (MQTT connection lost)")
+            domain_data["manager_last_state"] = domain_data["manager_status_select"].current_option
+            domain_data["mqtt_timer_event"] = async_call_later(self._hass, 30, self.async_mqtt_lost_connection)
@@ -5,11 +5,11 @@ Source: https://developers.home-assistant.io/docs/config_entries_config_flow_han
         https://www.home-assistant.io/docs/blueprint/selectors
 """
 
-import contextlib
+import asyncio
 import logging
 import re
+from typing import Any
 
-import async_timeout  # noqa: TID251
 import voluptuous as vol
 
 from homeassistant import config_entries
@@ -17,19 +17,162 @@ from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.selector import selector
 
-from .const import BOILER_REQ_ENTITIES, DOMAIN
+from .const import BOILER_REQ_ENTITIES, DOMAIN, VRM_AUTH_HEADER, VRM_STATS_URL
 
 _LOGGER = logging.getLogger(__name__)
 
+# MAC address of the Venus OS device (12 characters) and VRM installation ID (number)
+_MQTT_TOPIC_RE = re.compile(r"(?:^|N/|/?)(\w{12})(?=/?|$)")
+_VRM_ID_RE = re.compile(r"(\d+)")
+
+# ESPHome boiler entity names mapped to the configuration keys
+_BOILER_NAME_TO_CONFIG_KEY = {
+    "Water heater mode": "boiler_mode",
+    "Water heater heat": "boiler_heat",
+    "Water heater state": "boiler_state",
+    "Water heater temp1": "boiler_temp1",
+    "Water heater temp2": "boiler_temp2",
+    "Water heater thermostat": "boiler_thermostat",
+}
+
+# Translation table to turn the entity name into the configuration key ("Water heater mode" -> "water_heater_mode")
+_NAME_TO_KEY_TABLE = str.maketrans(" ", "_")
+
+# Selectors and schemas are built once at import time, every form render only references them
+_ENTITY_SELECTOR = selector({"entity": {}})
+_SENSOR_SELECTOR = selector({"entity": {"filter": {"domain": "sensor"}}})
+_BINARY_SENSOR_SELECTOR = selector({"entity": {"filter": {"domain": "binary_sensor"}}})
+_SELECT_SELECTOR = selector({"entity": {"filter": {"domain": "select"}}})
+_CLIMATE_SELECTOR = selector({"entity": {"filter": {"domain": "climate"}}})
+_ESPHOME_DEVICE_SELECTOR = selector({"device": {"filter": {"integration": "esphome"}}})
+
+_USER_SCHEMA = vol.Schema(
+    {
+        vol.Optional("integration_name", default="PV Water Heater Manager"): str,
+        vol.Required("boiler_conf_mode", default="automatic"): selector(
+            {
+                "select": {
+                    "options": [
+                        {
+                            "value": "automatic",
+                            "label": "Automatic Boiler Configuration",
+                        },
+                        {
+                            "value": "manual",
+                            "label": "Manual Boiler Configuration",
+                        },
+                    ]
+                }
+            }
+        ),
+        vol.Required("solar_conf_mode", default="automatic"): selector(
+            {
+                "select": {
+                    "options": [
+                        {
+                            "value": "automatic",
+                            "label": "Automatic Solar Configuration",
+                        },
+                        {
+                            "value": "manual",
+                            "label": "Manual Solar Configuration",
+                        },
+                    ]
+                }
+            }
+        ),
+    }
+)
+
+_BOILER_AUTO_SCHEMA = vol.Schema(
+    {
+        vol.Required("boiler_device"): _ESPHOME_DEVICE_SELECTOR,
+        vol.Required("boiler_power"): int,
+        vol.Required("boiler_volume"): int,
+    }
+)
+
+_BOILER_MANUAL_SCHEMA = vol.Schema(
+    {
+        vol.Required("boiler_mode"): _SELECT_SELECTOR,
+        vol.Required("boiler_heat"): _BINARY_SENSOR_SELECTOR,
+        vol.Required("boiler_state"): _SENSOR_SELECTOR,
+        vol.Optional("boiler_temp1"): _SENSOR_SELECTOR,
+        vol.Required("boiler_temp2"): _SENSOR_SELECTOR,
+        vol.Required("boiler_thermostat"): _CLIMATE_SELECTOR,
+        vol.Required("boiler_min_temp"): int,
+        vol.Required("boiler_max_temp"): int,
+        vol.Required("boiler_power"): int,
+        vol.Required("boiler_volume"): int,
+    }
+)
+
+_SOLAR_AUTO_SCHEMA = vol.Schema(
+    {
+        vol.Required("venus_mqtt_topic"): str,
+        vol.Optional("vrm_installation_id"): str,
+        vol.Optional("vrm_token"): str,
+    }
+)
+
+_SOLAR_MANUAL_SCHEMA = vol.Schema(
+    {
+        vol.Required("phase", default="1"): vol.In(["1", "2", "3"]),
+        vol.Optional("grid_l1"): _ENTITY_SELECTOR,
+        vol.Optional("grid_l2"): _ENTITY_SELECTOR,
+        vol.Optional("grid_l3"): _ENTITY_SELECTOR,
+        vol.Optional("load_l1"): _ENTITY_SELECTOR,
+        vol.Optional("load_l2"): _ENTITY_SELECTOR,
+        vol.Optional("load_l3"): _ENTITY_SELECTOR,
+        vol.Required("critical_load"): _ENTITY_SELECTOR,
+        vol.Optional("battery_ess"): _ENTITY_SELECTOR,
+        vol.Required("battery_power"): _ENTITY_SELECTOR,
+        vol.Required("battery_soc"): _ENTITY_SELECTOR,
+        vol.Required("pv_power"): _ENTITY_SELECTOR,
+        vol.Optional("system_state"): _ENTITY_SELECTOR,
+        vol.Required("grid_state"): _ENTITY_SELECTOR,
+        vol.Optional("vrm_installation_id"): str,
+        vol.Optional("vrm_token"): str,
+    }
+)
+
+_ADDITIONALS_SCHEMA = vol.Schema(
+    {
+        vol.Required("battery_capacity", default=4800): vol.All(int, vol.Range(min=0)),
+        vol.Required("battery_soc_top", default=65): vol.All(int, vol.Range(min=0, max=100)),
+        vol.Required("battery_soc_bottom", default=60): vol.All(int, vol.Range(min=0, max=100)),
+        vol.Required("temp_variable", default=20): vol.All(int, vol.Range(min=0, max=100)),
+        vol.Required("grid_threshold", default=2000): vol.All(int, vol.Range(min=10)),
+        vol.Required("manager_updates", default=10): vol.All(int, vol.Range(min=5, max=60)),
+    }
+)
+
+
+def _kilo_to_base_unit(value: int) -> int:
+    """Convert the value entered in kilo units (kW, kWh) to base units (W, Wh).
+
+    Values lower than 1000 are considered to be entered in kilo units.
+    Range checks are already done by the voluptuous schema before the step is called.
+    """
+
+    if value < 1000:
+        return value * 1000
+    return value
+
 
 class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for PV Water Heating Manager."""
 
     VERSION = 1
 
+    # Parent flow handler keeps its own __dict__, slots only cover the attributes added by this flow
+    __slots__ = ("config", "_boiler_entities", "_vrm_valid")
+
     def __init__(self) -> None:
         """Initialize the config flow."""
-        self.config = {}
+        self.config: dict[str, Any] = {}  # Accumulated configuration, stored as the config entry data
+        self._boiler_entities = None  # Boiler entities found in the automatic boiler step (reused in finish step)
+        self._vrm_valid = set()  # VRM credentials (installation_id, token) which were successfully validated
 
     async def async_step_user(self, user_input=None):
         """Handle a flow initiated by the user.
@@ -49,44 +192,7 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return self.async_abort(reason="single_instance_allowed")
 
         if user_input is None:
-            data_schema = vol.Schema(
-                {
-                    vol.Optional("integration_name", default="PV Water Heater Manager"): str,
-                    vol.Required("boiler_conf_mode", default="automatic"): selector(
-                        {
-                            "select": {
-                                "options": [
-                                    {
-                                        "value": "automatic",
-                                        "label": "Automatic Boiler Configuration",
-                                    },
-                                    {
-                                        "value": "manual",
-                                        "label": "Manual Boiler Configuration",
-                                    },
-                                ]
-                            }
-                        }
-                    ),
-                    vol.Required("solar_conf_mode", default="automatic"): selector(
-                        {
-                            "select": {
-                                "options": [
-                                    {
-                                        "value": "automatic",
-                                        "label": "Automatic Solar Configuration",
-                                    },
-                                    {
-                                        "value": "manual",
-                                        "label": "Manual Solar Configuration",
-                                    },
-                                ]
-                            }
-                        }
-                    ),
-                }
-            )
-            return self.async_show_form(step_id="user", data_schema=data_schema)
+            return self.async_show_form(step_id="user", data_schema=_USER_SCHEMA)
 
         # Append the user input to the configuration
         self.config.update(user_input)
@@ -111,49 +217,34 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """
 
         errors = {}
-        data_schema = vol.Schema(
-            {
-                vol.Required("boiler_device"): selector(
-                    {
-                        "device": {"filter": {"integration": "esphome"}},
-                    }
-                ),
-                vol.Required("boiler_power"): int,
-                vol.Required("boiler_volume"): int,
-            }
-        )
 
         if user_input is None:
-            return self.async_show_form(step_id="boiler_automatic", data_schema=data_schema)
+            return self.async_show_form(step_id="boiler_automatic", data_schema=_BOILER_AUTO_SCHEMA)
 
         # Validate the user input
-        if user_input:
-            # Check if the device exists in the device registry
-            entity_registry = er.async_get(self.hass)
-            device_id = user_input["boiler_device"]
-            entities = er.async_entries_for_device(entity_registry, device_id)
-            if entities is None:
-                _LOGGER.error("Device not found in the device registry")
-                errors["base"] = "boiler_device_not_found"
-
-            # Iterate over the entities and check if the required entities are available
-            required_entities = BOILER_REQ_ENTITIES
-            for entity in entities:
-                if entity.original_name in required_entities:
-                    with contextlib.suppress(ValueError):
-                        required_entities.remove(entity.original_name)
-
-            if required_entities:
-                _LOGGER.error("Required entities not found in the device")
-                errors["base"] = "boiler_required_entities_not_found"
-
-            # Check if the user has entered the power of the boiler in the correct format (Watts not kW)
-            if user_input["boiler_power"] < 1000:
-                user_input["boiler_power"] *= 1000
-
-            # Show form with errors if any errors occurred
-            if errors:
-                return self.async_show_form(step_id="boiler_automatic", data_schema=data_schema, errors=errors)
+        # Check if the device has any entities in the entity registry
+        entity_registry = er.async_get(self.hass)
+        device_id = user_input["boiler_device"]
+        entities = er.async_entries_for_device(entity_registry, device_id)
+        self._boiler_entities = entities
+        if not entities:
+            _LOGGER.error("Device not found in the device registry")
+            errors["base"] = "boiler_device_not_found"
+            return self.async_show_form(step_id="boiler_automatic", data_schema=_BOILER_AUTO_SCHEMA, errors=errors)
+
+        # Check if the required entities are available
+        missing_entities = BOILER_REQ_ENTITIES.difference(entity.original_name for entity in entities)
+
+        if missing_entities:
+            _LOGGER.error("Required entities not found in the device")
+            errors["base"] = "boiler_required_entities_not_found"
+
+        # Check if the user has entered the power of the boiler in the correct format (Watts not kW)
+        user_input["boiler_power"] = _kilo_to_base_unit(user_input["boiler_power"])
+
+        # Show form with errors if any errors occurred
+        if errors:
+            return self.async_show_form(step_id="boiler_automatic", data_schema=_BOILER_AUTO_SCHEMA, errors=errors)
 
         # Append the user input to the configuration
         self.config.update(user_input)
@@ -179,74 +270,10 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """
 
         if user_input is None:
-            data_schema = vol.Schema(
-                {
-                    vol.Required("boiler_mode"): selector(
-                        {
-                            "entity": {
-                                "filter": {
-                                    "domain": "select",
-                                }
-                            }
-                        }
-                    ),
-                    vol.Required("boiler_heat"): selector(
-                        {
-                            "entity": {
-                                "filter": {
-                                    "domain": "binary_sensor",
-                                }
-                            }
-                        }
-                    ),
-                    vol.Required("boiler_state"): selector(
-                        {
-                            "entity": {
-                                "filter": {
-                                    "domain": "sensor",
-                                }
-                            }
-                        }
-                    ),
-                    vol.Optional("boiler_temp1"): selector(
-                        {
-                            "entity": {
-                                "filter": {
-                                    "domain": "sensor",
-                                }
-                            }
-                        }
-                    ),
-                    vol.Required("boiler_temp2"): selector(
-                        {
-                            "entity": {
-                                "filter": {
-                                    "domain": "sensor",
-                                }
-                            }
-                        }
-                    ),
-                    vol.Required("boiler_thermostat"): selector(
-                        {
-                            "entity": {
-                                "filter": {
-                                    "domain": "climate",
-                                }
-                            }
-                        }
-                    ),
-                    vol.Required("boiler_min_temp"): int,
-                    vol.Required("boiler_max_temp"): int,
-                    vol.Required("boiler_power"): int,
-                    vol.Required("boiler_volume"): int,
-                }
-            )
-            return self.async_show_form(step_id="boiler_manual", data_schema=data_schema)
+            return self.async_show_form(step_id="boiler_manual", data_schema=_BOILER_MANUAL_SCHEMA)
 
-        if user_input:
-            # Check if the user has entered the power of the boiler in the correct format (Watts not kW)
-            if user_input["boiler_power"] < 1000:
-                user_input["boiler_power"] *= 1000
+        # Check if the user has entered the power of the boiler in the correct format (Watts not kW)
+        user_input["boiler_power"] = _kilo_to_base_unit(user_input["boiler_power"])
 
         # Append the user input to the configuration
         self.config.update(user_input)
@@ -260,7 +287,8 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             return await self.async_step_solar_automatic()
         return await self.async_step_solar_manual()
 
-    def _clear_mqtt_topic(self, mqtt_topic) -> str | None:
+    @staticmethod
+    def _clear_mqtt_topic(mqtt_topic) -> str | None:
         """Try to extract the MAC address from the Venus MQTT topic, if is written in the incorrect format.
 
         The MAC address is 12 characters long.
@@ -270,15 +298,15 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         """
 
-        pattern = r"(?:^|N/|/?)(\w{12})(?=/?|$)"
-        match = re.search(pattern, mqtt_topic)
+        match = _MQTT_TOPIC_RE.search(mqtt_topic)
 
         if match:
             return match.group(1)
 
         return None
 
-    def _clear_vrm_installation_id(self, installation_id) -> str | None:
+    @staticmethod
+    def _clear_vrm_installation_id(installation_id) -> str | None:
         """Try to extract the VRM installation ID from the user input.
 
         The installation ID is a number.
@@ -288,14 +316,82 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         """
 
-        pattern = r"(\d+)"
-        match = re.search(pattern, installation_id)
+        match = _VRM_ID_RE.search(installation_id)
 
         if match:
             return match.group(1)
 
         return None
 
+    async def _validate_vrm_input(self, user_input, errors) -> None:
+        """Validate the VRM installation ID and token entered in the solar step.
+
+        The installation ID is cleaned in the user input and errors are added to the errors dict.
+        """
+
+        # VRM installation ID and token are required to use VRM API
+        if user_input.get("vrm_installation_id") and not user_input.get("vrm_token"):
+            _LOGGER.error("VRM token is missing")
+            errors["vrm_token"] = "missing_vrm_token"
+        if user_input.get("vrm_token") and not user_input.get("vrm_installation_id"):
+            _LOGGER.error("VRM installation ID is missing")
+            errors["vrm_installation_id"] = "missing_vrm_installation_id"
+
+        # Check if the VRM installation ID is valid (installation ID must be a number)
+        if user_input.get("vrm_installation_id") and not user_input["vrm_installation_id"].isdigit():
+            # Clean the VRM installation ID
+            ret = self._clear_vrm_installation_id(user_input["vrm_installation_id"])
+            if ret is None:
+                _LOGGER.error("Invalid VRM installation ID")
+                errors["vrm_installation_id"] = "invalid_vrm_installation_id"
+            user_input["vrm_installation_id"] = ret
+
+        # Try to connect to the VRM API (only if the input is valid, the form would be shown again anyway)
+        if not errors and user_input.get("vrm_installation_id") and user_input.get("vrm_token"):
+            ret = await self._validate_vrm(user_input["vrm_installation_id"], user_input["vrm_token"])
+            if ret is not None:
+                errors["vrm_installation_id"] = ret
+
+    async def _validate_vrm(self, installation_id, token) -> str | None:
+        """Try to connect to the VRM API with the given installation ID and token.
+
+        Valid credentials are remembered for the lifetime of the flow, so resubmitting the form doesn't call the API again.
+        Failed checks are not remembered, the user may fix the connection and try again.
+
+        Returns:
+        - str: Error key if the connection failed, None otherwise.
+
+        """
+
+        key = (installation_id, token)
+        if key in self._vrm_valid:
+            return None
+
+        ret = await self._request_vrm(installation_id, token)
+        if ret is None:
+            self._vrm_valid.add(key)
+
+        return ret
+
+    async def _request_vrm(self, installation_id, token) -> str | None:
+        """Send the request to the VRM API and return error key if it failed."""
+
+        try:
+            async with asyncio.timeout(10):
+                session = async_get_clientsession(self.hass)
+                async with session.get(
+                    VRM_STATS_URL.format(installation_id),
+                    headers={"x-authorization": VRM_AUTH_HEADER.format(token)},
+                ) as resp:
+                    if resp.status != 200:
+                        _LOGGER.error("Unable to connect to the VRM API")
+                        return "vrm_api_connection_error"
+        except Exception as e:
+            _LOGGER.error("Unable to connect to the VRM API: %s", e)
+            return "vrm_api_connection_error_2"
+
+        return None
+
     async def async_step_solar_automatic(self, user_input=None):
         """Handle the step for automatic solar configuration.
 
@@ -310,63 +406,25 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """
 
         errors = {}
-        data_schema = vol.Schema(
-            {
-                vol.Required("venus_mqtt_topic"): str,
-                vol.Optional("vrm_installation_id"): str,
-                vol.Optional("vrm_token"): str,
-            }
-        )
 
         if user_input is None:
-            return self.async_show_form(step_id="solar_automatic", data_schema=data_schema)
+            return self.async_show_form(step_id="solar_automatic", data_schema=_SOLAR_AUTO_SCHEMA)
 
         # Validate the user input
-        if user_input:
-            # Clean the MQTT topic
-            if len(user_input["venus_mqtt_topic"]) != 12:
-                ret = self._clear_mqtt_topic(user_input["venus_mqtt_topic"])
-                if ret is None:
-                    _LOGGER.error("Invalid venus MQTT topic")
-                    errors["venus_mqtt_topic"] = "invalid_venus_mqtt_topic"
-                user_input["venus_mqtt_topic"] = ret
-
-            # VRM installation ID and token are required to use VRM API
-            if user_input.get("vrm_installation_id") and not user_input.get("vrm_token"):
-                _LOGGER.error("VRM token is missing")
-                errors["vrm_token"] = "missing_vrm_token"
-            if user_input.get("vrm_token") and not user_input.get("vrm_installation_id"):
-                _LOGGER.error("VRM installation ID is missing")
-                errors["vrm_installation_id"] = "missing_vrm_installation_id"
-
-            # Check if the VRM installation ID is valid (installation ID must be a number)
-            if user_input.get("vrm_installation_id") and not user_input["vrm_installation_id"].isdigit():
-                # Clean the VRM installation ID
-                ret = self._clear_vrm_installation_id(user_input["vrm_installation_id"])
-                if ret is None:
-                    _LOGGER.error("Invalid VRM installation ID")
-                    errors["vrm_installation_id"] = "invalid_vrm_installation_id"
-                user_input["vrm_installation_id"] = ret
-
-            # Try to connect to the VRM API
-            if user_input.get("vrm_installation_id") and user_input.get("vrm_token"):
-                try:
-                    async with async_timeout.timeout(10):
-                        session = async_get_clientsession(self.hass)
-                        resp = await session.get(
-                            f"https://vrmapi.victronenergy.com/v2/installations/{user_input["vrm_installation_id"]}/stats",
-                            headers={"x-authorization": f"Token {user_input["vrm_token"]}"},
-                        )
-                        if resp.status != 200:
-                            _LOGGER.error("Unable to connect to the VRM API")
-                            errors["vrm_installation_id"] = "vrm_api_connection_error"
-                except Exception as e:
-                    _LOGGER.error("Unable to connect to the VRM API: %s", e)
-                    errors["vrm_installation_id"] = "vrm_api_connection_error_2"
-
-            # Show form with errors if any errors occurred
-            if errors:
-                return self.async_show_form(step_id="solar_automatic", data_schema=data_schema, errors=errors)
+        # Clean the MQTT topic
+        if len(user_input["venus_mqtt_topic"]) != 12:
+            ret = self._clear_mqtt_topic(user_input["venus_mqtt_topic"])
+            if ret is None:
+                _LOGGER.error("Invalid venus MQTT topic")
+                errors["venus_mqtt_topic"] = "invalid_venus_mqtt_topic"
+            user_input["venus_mqtt_topic"] = ret
+
+        # Validate the VRM installation ID and token
+        await self._validate_vrm_input(user_input, errors)
+
+        # Show form with errors if any errors occurred
+        if errors:
+            return self.async_show_form(step_id="solar_automatic", data_schema=_SOLAR_AUTO_SCHEMA, errors=errors)
 
         # Append the user input to the configuration
         self.config.update(user_input)
@@ -403,87 +461,33 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """
 
         errors = {}
-        data_schema = vol.Schema(
-            {
-                vol.Required("phase", default="1"): vol.In(["1", "2", "3"]),
-                vol.Optional("grid_l1"): selector({"entity": {}}),
-                vol.Optional("grid_l2"): selector({"entity": {}}),
-                vol.Optional("grid_l3"): selector({"entity": {}}),
-                vol.Optional("load_l1"): selector({"entity": {}}),
-                vol.Optional("load_l2"): selector({"entity": {}}),
-                vol.Optional("load_l3"): selector({"entity": {}}),
-                vol.Required("critical_load"): selector({"entity": {}}),
-                vol.Optional("battery_ess"): selector({"entity": {}}),
-                vol.Required("battery_power"): selector({"entity": {}}),
-                vol.Required("battery_soc"): selector({"entity": {}}),
-                vol.Required("pv_power"): selector({"entity": {}}),
-                vol.Optional("system_state"): selector({"entity": {}}),
-                vol.Required("grid_state"): selector({"entity": {}}),
-                vol.Optional("vrm_installation_id"): str,
-                vol.Optional("vrm_token"): str,
-            }
-        )
 
         if user_input is None:
-            return self.async_show_form(step_id="solar_manual", data_schema=data_schema)
+            return self.async_show_form(step_id="solar_manual", data_schema=_SOLAR_MANUAL_SCHEMA)
 
         # Validate the user input
-        if user_input:
-            # Check if at least one grid and load sensor is selected
-            if not user_input.get("grid_l1") and not user_input.get("grid_l2") and not user_input.get("grid_l3"):
-                _LOGGER.error("At least one grid sensor must be selected")
-                errors["base"] = "missing_grid_sensor"
-            if not user_input.get("load_l1") and not user_input.get("load_l2") and not user_input.get("load_l3"):
-                _LOGGER.error("At least one load sensor must be selected")
-                errors["base"] = "missing_load_sensor"
-
-            # Check if phase matches the selected sensors
-            if user_input["phase"] == "1" and not user_input.get("grid_l1") and not user_input.get("load_l1"):
-                _LOGGER.error("Phase 1 selected, but no sensors for phase 1 are selected")
-                errors["base"] = "missing_phase_sensor"
-            if user_input["phase"] == "2" and not user_input.get("grid_l2") and not user_input.get("load_l2"):
-                _LOGGER.error("Phase 2 selected, but no sensors for phase 2 are selected")
-                errors["base"] = "missing_phase_sensor"
-            if user_input["phase"] == "3" and not user_input.get("grid_l3") and not user_input.get("load_l3"):
-                _LOGGER.error("Phase 3 selected, but no sensors for phase 3 are selected")
-                errors["base"] = "missing_phase_sensor"
-
-            # VRM installation ID and token are required to use VRM API
-            if user_input.get("vrm_installation_id") and not user_input.get("vrm_token"):
-                _LOGGER.error("VRM token is missing")
-                errors["vrm_token"] = "missing_vrm_token"
-            if user_input.get("vrm_token") and not user_input.get("vrm_installation_id"):
-                _LOGGER.error("VRM installation ID is missing")
-                errors["vrm_installation_id"] = "missing_vrm_installation_id"
-
-            # Check if the VRM installation ID is valid (installation ID must be a number)
-            if user_input.get("vrm_installation_id") and not user_input["vrm_installation_id"].isdigit():
-                # Clean the VRM installation ID
-                ret = self._clear_vrm_installation_id(user_input["vrm_installation_id"])
-                if ret is None:
-                    _LOGGER.error("Invalid VRM installation ID")
-                    errors["vrm_installation_id"] = "invalid_vrm_installation_id"
-                user_input["vrm_installation_id"] = ret
-
-            # Try to connect to the VRM API
-            if user_input.get("vrm_installation_id") and user_input.get("vrm_token"):
-                try:
-                    async with async_timeout.timeout(10):
-                        session = async_get_clientsession(self.hass)
-                        resp = await session.get(
-                            f"https://vrmapi.victronenergy.com/v2/installations/{user_input["vrm_installation_id"]}/stats",
-                            headers={"x-authorization": f"Token {user_input["vrm_token"]}"},
-                        )
-                        if resp.status != 200:
-                            _LOGGER.error("Unable to connect to the VRM API")
-                            errors["vrm_installation_id"] = "vrm_api_connection_error"
-                except Exception as e:
-                    _LOGGER.error("Unable to connect to the VRM API: %s", e)
-                    errors["vrm_installation_id"] = "vrm_api_connection_error_2"
-
-            # Show form with errors if any errors occurred
-            if errors:
-                return self.async_show_form(step_id="solar_manual", data_schema=data_schema, errors=errors)
+        # Check if at least one grid and load sensor is selected
+        grids = (user_input.get("grid_l1"), user_input.get("grid_l2"), user_input.get("grid_l3"))
+        loads = (user_input.get("load_l1"), user_input.get("load_l2"), user_input.get("load_l3"))
+        if not any(grids):
+            _LOGGER.error("At least one grid sensor must be selected")
+            errors["base"] = "missing_grid_sensor"
+        if not any(loads):
+            _LOGGER.error("At least one load sensor must be selected")
+            errors["base"] = "missing_load_sensor"
+
+        # Check if phase matches the selected sensors
+        phase_idx = int(user_input["phase"]) - 1
+        if not grids[phase_idx] and not loads[phase_idx]:
+            _LOGGER.error("Phase %s selected, but no sensors for this phase are selected", user_input["phase"])
+            errors["base"] = "missing_phase_sensor"
+
+        # Validate the VRM installation ID and token
+        await self._validate_vrm_input(user_input, errors)
+
+        # Show form with errors if any errors occurred
+        if errors:
+            return self.async_show_form(step_id="solar_manual", data_schema=_SOLAR_MANUAL_SCHEMA, errors=errors)
 
         # Append the user input to the configuration
         self.config.update(user_input)
@@ -507,34 +511,22 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """
 
         errors = {}
-        data_schema = vol.Schema(
-            {
-                vol.Required("battery_capacity", default=4800): vol.All(int, vol.Range(min=0)),
-                vol.Required("battery_soc_top", default=65): vol.All(int, vol.Range(min=0, max=100)),
-                vol.Required("battery_soc_bottom", default=60): vol.All(int, vol.Range(min=0, max=100)),
-                vol.Required("temp_variable", default=20): vol.All(int, vol.Range(min=0, max=100)),
-                vol.Required("grid_threshold", default=2000): vol.All(int, vol.Range(min=10)),
-                vol.Required("manager_updates", default=10): vol.All(int, vol.Range(min=5, max=60)),
-            }
-        )
 
         if user_input is None:
-            return self.async_show_form(step_id="additionals", data_schema=data_schema)
+            return self.async_show_form(step_id="additionals", data_schema=_ADDITIONALS_SCHEMA)
 
         # Validate the user input
-        if user_input:
-            # Check if the user has entered the power of the battery in the correct format (Wh not kWh)
-            if user_input["battery_capacity"] < 1000:
-                user_input["battery_capacity"] *= 1000
+        # Check if the user has entered the power of the battery in the correct format (Wh not kWh)
+        user_input["battery_capacity"] = _kilo_to_base_unit(user_input["battery_capacity"])
 
-            # Battery SOC bottom must be lower than the top
-            if user_input["battery_soc_bottom"] >= user_input["battery_soc_top"]:
-                _LOGGER.error("Battery SOC bottom must be lower than the top")
-                errors["battery_soc_bottom"] = "battery_soc_bottom"
+        # Battery SOC bottom must be lower than the top
+        if user_input["battery_soc_bottom"] >= user_input["battery_soc_top"]:
+            _LOGGER.error("Battery SOC bottom must be lower than the top")
+            errors["battery_soc_bottom"] = "battery_soc_bottom"
 
-            # Show form with errors if any errors occurred
-            if errors:
-                return self.async_show_form(step_id="additionals", data_schema=data_schema, errors=errors)
+        # Show form with errors if any errors occurred
+        if errors:
+            return self.async_show_form(step_id="additionals", data_schema=_ADDITIONALS_SCHEMA, errors=errors)
 
         # Append the user input to the configuration
         self.config.update(user_input)
@@ -549,29 +541,25 @@ class PVWaterHeatingControlConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """
 
         if self.config["boiler_conf_mode"] == "automatic":
-            # Get boiler's entities
-            entity_registry = er.async_get(self.hass)
-            device_id = self.config["boiler_device"]
-            entities = er.async_entries_for_device(entity_registry, device_id)
+            # Get boiler's entities (already loaded in the automatic boiler step)
+            entities = self._boiler_entities
+            if entities is None:
+                entity_registry = er.async_get(self.hass)
+                entities = er.async_entries_for_device(entity_registry, self.config["boiler_device"])
 
             # Store the entities in the configuration
             for entity in entities:
-                self.config[entity.original_name.replace(" ", "_").lower()] = entity.entity_id
-
-                if entity.original_name == "Water heater mode":
-                    self.config["boiler_mode"] = entity.entity_id
-                elif entity.original_name == "Water heater heat":
-                    self.config["boiler_heat"] = entity.entity_id
-                elif entity.original_name == "Water heater state":
-                    self.config["boiler_state"] = entity.entity_id
-                elif entity.original_name == "Water heater temp1":
-                    self.config["boiler_temp1"] = entity.entity_id
-                elif entity.original_name == "Water heater temp2":
-                    self.config["boiler_temp2"] = entity.entity_id
-                elif entity.original_name == "Water heater thermostat":
+                self.config[entity.original_name.translate(_NAME_TO_KEY_TABLE).lower()] = entity.entity_id
+
+                # Map the boiler entities to the configuration keys used by the manager
+                config_key = _BOILER_NAME_TO_CONFIG_KEY.get(entity.original_name)
+                if config_key is None:
+                    continue
+
+                self.config[config_key] = entity.entity_id
+                if config_key == "boiler_thermostat":
                     self.config["boiler_min_temp"] = entity.capabilities.get("min_temp")
                     self.config["boiler_max_temp"] = entity.capabilities.get("max_temp")
-                    self.config["boiler_thermostat"] = entity.entity_id
 
         _LOGGER.debug("Configuration done")
 
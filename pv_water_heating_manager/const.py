@@ -1,118 +1,71 @@
 """Constants for the PV Water Heating Manager integration."""
 
+from types import MappingProxyType
+
 DOMAIN = "pv_water_heating_manager"
 
-# Topics to discovery and subscribe on MQTT broker
-TOPICS = {
+# VRM API stats endpoint (formatted with the installation ID) and authorization header value (formatted with the token)
+VRM_STATS_URL = "https://vrmapi.victronenergy.com/v2/installations/{}/stats"
+VRM_AUTH_HEADER = "Token {}"
+
+# Value templates of the discovered sensors (rounded numeric value, raw value)
+_ROUNDED_TEMPLATE = "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}"
+_RAW_TEMPLATE = "{{ value_json.value }}"
+
+# Topics to discovery and subscribe on MQTT broker (topic, type, name, unit of measurement, state class, template)
+_TOPICS_SPEC = (
     # Grid Loads
-    "Ac/Grid/L1/Power": {
-        "type": "system",
-        "name": "Grid L1",
-        "unit_of_measurement": "W",
-        "state_class": "measurement",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
-    "Ac/Grid/L2/Power": {
-        "type": "system",
-        "name": "Grid L2",
-        "unit_of_measurement": "W",
-        "state_class": "measurement",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
-    "Ac/Grid/L3/Power": {
-        "type": "system",
-        "name": "Grid L3",
-        "unit_of_measurement": "W",
-        "state_class": "measurement",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
+    ("Ac/Grid/L1/Power", "system", "Grid L1", "W", "measurement", _ROUNDED_TEMPLATE),
+    ("Ac/Grid/L2/Power", "system", "Grid L2", "W", "measurement", _ROUNDED_TEMPLATE),
+    ("Ac/Grid/L3/Power", "system", "Grid L3", "W", "measurement", _ROUNDED_TEMPLATE),
     # AC Loads
-    "Ac/ConsumptionOnInput/L1/Power": {
-        "type": "system",
-        "name": "Load L1",
-        "unit_of_measurement": "W",
-        "state_class": "measurement",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
-    "Ac/ConsumptionOnInput/L2/Power": {
-        "type": "system",
-        "name": "Load L2",
-        "unit_of_measurement": "W",
-        "state_class": "measurement",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
-    "Ac/ConsumptionOnInput/L3/Power": {
-        "type": "system",
-        "name": "Load L3",
-        "unit_of_measurement": "W",
-        "state_class": "measurement",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
+    ("Ac/ConsumptionOnInput/L1/Power", "system", "Load L1", "W", "measurement", _ROUNDED_TEMPLATE),
+    ("Ac/ConsumptionOnInput/L2/Power", "system", "Load L2", "W", "measurement", _ROUNDED_TEMPLATE),
+    ("Ac/ConsumptionOnInput/L3/Power", "system", "Load L3", "W", "measurement", _ROUNDED_TEMPLATE),
     # Critical Load
-    "Ac/ConsumptionOnOutput": {
-        "type": "critical_load",
-        "name": "Critical Load",
-        "unit_of_measurement": "W",
-        "state_class": "measurement",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
+    ("Ac/ConsumptionOnOutput", "critical_load", "Critical Load", "W", "measurement", _ROUNDED_TEMPLATE),
     # Battery ESS
-    "Settings/CGwacs/BatteryLife/State": {
-        "type": "battery_ess",
-        "name": "Battery ESS",
-        "unit_of_measurement": "",
-        "state_class": "",
-        "value_template": "{{ value_json.value }}",
-    },
+    ("Settings/CGwacs/BatteryLife/State", "battery_ess", "Battery ESS", "", "", _RAW_TEMPLATE),
     # Battery Power
-    "Power": {
-        "type": "battery_power",
-        "name": "Battery Power",
-        "unit_of_measurement": "W",
-        "state_class": "measurement",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
+    ("Power", "battery_power", "Battery Power", "W", "measurement", _ROUNDED_TEMPLATE),
     # Battery SOC
-    "Soc": {
-        "type": "battery_soc",
-        "name": "Battery SOC",
-        "unit_of_measurement": "%",
-        "state_class": "",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
+    ("Soc", "battery_soc", "Battery SOC", "%", "", _ROUNDED_TEMPLATE),
     # PV Power
-    "Dc/Pv/Power": {
-        "type": "system",
-        "name": "PV Power",
-        "unit_of_measurement": "W",
-        "state_class": "measurement",
-        "value_template": "{% if value_json.value != None %}{{ value_json.value | round(0) }}{% else %}None{% endif %}",
-    },
+    ("Dc/Pv/Power", "system", "PV Power", "W", "measurement", _ROUNDED_TEMPLATE),
     # System State (Discharging, Bulk Charging, etc.)
-    "SystemState/State": {
-        "type": "system",
-        "name": "System State",
-        "unit_of_measurement": "",
-        "state_class": "",
-        "value_template": "{{ value_json.value }}",
-    },
+    ("SystemState/State", "system", "System State", "", "", _RAW_TEMPLATE),
     # Grid State (Grid available or Grid lost)
-    "Alarms/GridLost": {
-        "type": "grid_lost",
-        "name": "Grid Lost",
-        "unit_of_measurement": "",
-        "state_class": "",
-        "value_template": "{{ value_json.value }}",
-    },
-}
+    ("Alarms/GridLost", "grid_lost", "Grid Lost", "", "", _RAW_TEMPLATE),
+)
+
+# Read-only views, so the shared sensor configs can't be mutated
+TOPICS = MappingProxyType(
+    {
+        topic: MappingProxyType(
+            {
+                "type": sensor_type,
+                "name": name,
+                "unit_of_measurement": unit,
+                "state_class": state_class,
+                "value_template": template,
+            }
+        )
+        for topic, sensor_type, name, unit, state_class, template in _TOPICS_SPEC
+    }
+)
+
+# Topics as (topic, sensor config) pairs (TOPICS is read-only, so the pairs are built only once)
+TOPIC_ITEMS = tuple(TOPICS.items())
 
 
-# Required entities by automatic boiler setup
-BOILER_REQ_ENTITIES = [
-    "Water heater heat",
-    "Water heater temp1",
-    "Water heater temp2",
-    "Water heater state",
-    "Water heater thermostat",
-    "Water heater mode",
-]
+# Required entities by automatic boiler setup (frozenset, so it can't be mutated by the config flow)
+BOILER_REQ_ENTITIES = frozenset(
+    {
+        "Water heater heat",
+        "Water heater temp1",
+        "Water heater temp2",
+        "Water heater state",
+        "Water heater thermostat",
+        "Water heater mode",
+    }
+)
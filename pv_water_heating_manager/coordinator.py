@@ -0,0 +1,171 @@
+"""VRM forecast coordinator for the PV Water Heating Manager integration.
+
+The coordinator fetches today's and tomorrow's PV generation forecast with a single VRM API request,
+both forecast sensors are updated from its data.
+
+Source: https://developers.home-assistant.io/docs/integration_fetching_data
+        https://vrm-api-docs.victronenergy.com/#/ (Missing forecast type)
+        https://flows.nodered.org/node/victron-vrm-api
+"""
+
+import asyncio
+from datetime import timedelta
+import logging
+from time import time as time_now
+
+from aiohttp import ClientError, ClientResponseError
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
+
+from .const import VRM_AUTH_HEADER, VRM_STATS_URL
+
+SCAN_INTERVAL = timedelta(hours=1)  # How often to fetch forecast data
+_FETCH_ATTEMPTS = 3  # How many times to try to fetch forecast data
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class VrmForecastCoordinator(DataUpdateCoordinator[dict[str, int]]):
+    """Coordinator of the VRM PV generation forecast.
+
+    Data:
+    - today -- Today's expected PV generation in Watt-hours
+    - tomorrow -- Tomorrow's expected PV generation in Watt-hours
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the coordinator."""
+        super().__init__(hass, _LOGGER, name="PV Generation Forecast", update_interval=SCAN_INTERVAL)
+        self._entry = entry
+        self._load_config()
+
+        # When the forecast was last fetched or confirmed unchanged (timestamp)
+        self.fetched_at: float | None = None
+
+        # Keep the URL and the authorization header up to date with the config entry
+        entry.async_on_unload(entry.add_update_listener(self._async_config_updated))
+
+    def _load_config(self) -> None:
+        """Build the request URL and headers from the config entry (the last response is forgotten)."""
+
+        data = self._entry.data
+        self._url = VRM_STATS_URL.format(data.get("vrm_installation_id"))
+        self._headers = {"x-authorization": VRM_AUTH_HEADER.format(data.get("vrm_token"))}
+
+        # Validators of the last response, the forecast is requested only if it has changed (conditional GET)
+        self._etag = None
+        self._last_modified = None
+
+        # Start of the requested range of the last data (the last forecast is kept on failure only for the same days)
+        self._range_start = None
+
+    async def _async_config_updated(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Handle the config entry update (fetch the forecast again, if the VRM installation or token changed)."""
+
+        data = entry.data
+        url = VRM_STATS_URL.format(data.get("vrm_installation_id"))
+        headers = {"x-authorization": VRM_AUTH_HEADER.format(data.get("vrm_token"))}
+        if url != self._url or headers != self._headers:
+            self._load_config()
+            await self.async_request_refresh()
+
+    @staticmethod
+    def _calculate_time_range() -> tuple[int, int, int]:
+        """Calculate the time range for the forecast.
+
+        Function calculates the start and end parameters for the forecast API call.
+        Converts the current time to today's start time (i.e. 00:00) and tomorrow's end time (i.e. 23:59),
+        tomorrow's start time splits the daily records between today and tomorrow.
+
+        Source: https://docs.python.org/3/library/datetime.html
+
+        Returns:
+            tuple[int, int, int]: Start, end and tomorrow's start times as timestamps
+
+        """
+
+        # Get the current datetime (in the time zone configured in Home Assistant)
+        now = dt_util.now()
+
+        # Calculate today's start and tomorrow's start and end time
+        start_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        tomorrow_time = start_time + timedelta(days=1)
+        end_time = now.replace(hour=23, minute=59, second=59, microsecond=0) + timedelta(days=1)
+
+        # Return the times as timestamps
+        return int(start_time.timestamp()), int(end_time.timestamp()), int(tomorrow_time.timestamp())
+
+    async def _async_update_data(self) -> dict[str, int]:
+        """Fetch today's and tomorrow's forecast from the VRM API.
+
+        Daily records are [timestamp in ms, value] pairs, they are summed up by the day they belong to.
+        If the forecast has not changed since the last request (HTTP 304), the last data are kept.
+        """
+
+        start, end, tomorrow = self._calculate_time_range()
+        params = {"type": "forecast", "start": start, "end": end, "interval": "days"}
+
+        # Ask only for a changed forecast, if the last one is known and covers the same days
+        headers = self._headers
+        if self.data is not None and self._range_start == start:
+            headers = dict(headers)
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+
+        _LOGGER.debug("Updating the PV Generation Forecast")
+
+        # Transient errors (timeout, connection or server error) are retried with exponential backoff (1s, 2s)
+        for attempt in range(_FETCH_ATTEMPTS):
+            try:
+                async with asyncio.timeout(10):
+                    session = async_get_clientsession(self.hass)
+                    async with session.get(self._url, params=params, headers=headers) as response:
+                        if response.status == 304:
+                            _LOGGER.debug("PV Generation Forecast has not changed")
+                            self.fetched_at = time_now()
+                            return self.data
+
+                        response.raise_for_status()
+                        data = json_loads(await response.read())
+                        etag = response.headers.get("ETag")
+                        last_modified = response.headers.get("Last-Modified")
+                break
+            except (TimeoutError, ClientError) as error:
+                # Client errors (4xx, e.g. invalid token) are not transient, they are not retried
+                if isinstance(error, ClientResponseError) and error.status < 500:
+                    raise UpdateFailed(error) from error
+
+                if attempt + 1 < _FETCH_ATTEMPTS:
+                    await asyncio.sleep(2**attempt)
+                    continue
+
+                # Forecast of the same days is still valid, keep it until the next update
+                if self.data is not None and self._range_start == start:
+                    _LOGGER.warning("Unable to update the PV Generation Forecast, keeping the last one: %s", error)
+                    return self.data
+                raise UpdateFailed(error) from error
+            except Exception as error:
+                raise UpdateFailed(error) from error
+
+        try:
+            records = data["records"]["solar_yield_forecast"] or []
+        except (KeyError, TypeError) as error:
+            raise UpdateFailed(error) from error
+
+        self._etag = etag
+        self._last_modified = last_modified
+        self._range_start = start
+        self.fetched_at = time_now()
+
+        forecast = {"today": 0, "tomorrow": 0}
+        tomorrow_ms = tomorrow * 1000
+        for timestamp, value in records:
+            forecast["today" if timestamp < tomorrow_ms else "tomorrow"] += int(value or 0)
+
+        return forecast
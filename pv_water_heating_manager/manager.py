@@ -10,18 +10,23 @@ Sources:
         https://community.home-assistant.io/t/trying-to-isolate-slow-history/279016
 """
 
-import contextlib
-from datetime import date, datetime, time, timedelta
+import asyncio
+from collections import deque
+from datetime import datetime, time, timedelta
+from functools import lru_cache, partial
 import logging
+from time import monotonic as time_monotonic
 
 import numpy as np
 
 from homeassistant.components.recorder import history
+from homeassistant.components.recorder.statistics import statistics_during_period
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
 from homeassistant.helpers.event import (
+    async_call_later,
     async_track_point_in_utc_time,
-    async_track_time_change,
+    async_track_state_change_event,
 )
 import homeassistant.util.dt as dt_util
 
@@ -29,6 +34,40 @@ from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
+# How long (in seconds) is the sensor history of a fixed time window cached
+_HISTORY_CACHE_FIXED_TTL = 3600
+
+# How long (in seconds) is the sensor history of a fixed time window cached, if the window has already ended
+_HISTORY_CACHE_PAST_TTL = 86400
+
+# How far back are the rolling history buffers fetched again on top-up (the recorder commits the states with a delay)
+_HISTORY_TOP_UP_OVERLAP = timedelta(seconds=10)
+
+# Converters of the sensor state by the requested type (None returns the state as it is)
+_STATE_CONVERTERS = {
+    "string": str,
+    "float": float,
+    "int": int,
+    None: lambda state: state,
+}
+
+# Entry data keys of the entities, whose state change triggers the manager run
+_INPUT_ENTITY_KEYS = (
+    "grid_l1",
+    "grid_l2",
+    "grid_l3",
+    "critical_load",
+    "pv_power",
+    "battery_soc",
+    "boiler_heat",
+    "boiler_state",
+    "boiler_temp2",
+)
+
+# Boiler heat constants (kWh per litre and °C, and minutes per litre and °C for 1 W of boiler power)
+_K_PT = 4.186 / 3600
+_K_PT_TIME = 4.186 * 60 / 3600 * 1000
+
 
 class PVWaterHeatingManager:
     """Representation of the PV Water Heating Manager."""
@@ -38,38 +77,154 @@ class PVWaterHeatingManager:
         self._hass = hass
         self._entry = entry
 
+        # Jobs for the scheduled callbacks, so they are not wrapped again on every schedule
+        self._plan_job = HassJob(self._plan_start_night_pre_heating, "pvwh plan night pre-heating")
+        self._start_job = HassJob(self._start_night_pre_heating, "pvwh start night pre-heating")
+        self._end_job = HassJob(self._end_pre_heating, "pvwh end night pre-heating")
+        self._run_job = HassJob(self._run_pending, "pvwh run manager")
+
+        # Debounced manager run (time of the last run and cancel callback of the pending run)
+        self._last_run = 0.0
+        self._cancel_pending_run = None
+
+        # Cached results of the sensor history {(entity_id, s_time, mins, secs, min_val, percentile): (expires, value)}
+        self._history_cache = {}
+
+        # Numeric states of the last X minutes, topped up on every fetch {(entity_id, window): (states, end_time)}
+        self._history_buffers = {}
+
+        # State changes of the tracked sensors recorded in memory, so the history is not read from the recorder
+        # {entity_id: deque of (timestamp, value | None)} and the longest requested window {entity_id: seconds}
+        self._tracked_entities = frozenset()
+        self._live_states = {}
+        self._live_windows = {}
+
+        # Values set in the configuration by the user (parsed once, refreshed when the config entry is updated)
+        self._load_config()
+        entry.async_on_unload(entry.add_update_listener(self._async_config_updated))
+
+    def _load_config(self) -> None:
+        """Parse the static configuration values from the config entry."""
+
+        data = self._entry.data
+        self._boiler_rated_power = int(data["boiler_power"])
+        self._boiler_volume = int(data["boiler_volume"])
+        self._battery_capacity = int(data["battery_capacity"])
+        self._battery_top_threshold = int(data["battery_soc_top"])
+        self._battery_bottom_threshold = int(data["battery_soc_bottom"])
+        self._grid_threshold = int(data["grid_threshold"])
+        self._run_interval = int(data.get("manager_updates", 10))
+        self._temp_variation = int(data["temp_variable"])
+        self._boiler_min_temp = data["boiler_min_temp"]  # Thermostat's minimum temperature (int or float)
+        self._boiler_thermostat = data["boiler_thermostat"]  # ID of the thermostat
+        self._boiler_mode = data["boiler_mode"]  # ID of the mode selector
+        self._solar_conf_mode = data["solar_conf_mode"]
+
+    async def _async_config_updated(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Handle the config entry update (refresh the parsed configuration values)."""
+        self._load_config()
+
+    @callback
+    def track_inputs(self) -> CALLBACK_TYPE:
+        """Run the manager whenever one of its input entities changes.
+
+        Runs are debounced, so the manager runs at most once per configured interval ("manager_updates").
+
+        Returns:
+            Callback to stop the tracking (also cancels the pending run)
+
+        """
+
+        entry_data = self._entry.data
+        entity_ids = [entry_data[key] for key in _INPUT_ENTITY_KEYS if entry_data.get(key)]
+        cancel_tracking = async_track_state_change_event(self._hass, entity_ids, self._input_changed)
+        self._tracked_entities = frozenset(entity_ids)
+
+        # Run the manager once right away, so it does not wait for the first state change
+        self._input_changed(None)
+
+        @callback
+        def cancel() -> None:
+            cancel_tracking()
+            if self._cancel_pending_run is not None:
+                self._cancel_pending_run()
+                self._cancel_pending_run = None
+
+            # State changes are not recorded anymore, so the recorded ones can't be used
+            self._tracked_entities = frozenset()
+            self._live_states.clear()
+            self._live_windows.clear()
+
+        return cancel
+
+    @callback
+    def _input_changed(self, event) -> None:
+        """Record the state change and schedule the manager run, if it is not already pending."""
+
+        if event is not None:
+            entity_id = event.data["entity_id"]
+            live_states = self._live_states.get(entity_id)
+            old_state = event.data["old_state"]
+            new_state = event.data["new_state"]
+
+            # Only state value changes are recorded (same as significant changes from the recorder)
+            state_changed = new_state is not None and (old_state is None or old_state.state != new_state.state)
+            if live_states is not None and state_changed:
+                self._append_live_state(live_states, new_state)
+
+                # Drop the states older than the longest requested window (the state at its start is kept)
+                oldest_ts = live_states[-1][0] - self._live_windows[entity_id]
+                while len(live_states) > 1 and live_states[1][0] <= oldest_ts:
+                    live_states.popleft()
+
+        if self._cancel_pending_run is not None:
+            return
+
+        delay = max(self._last_run + self._run_interval - time_monotonic(), 0)
+        self._cancel_pending_run = async_call_later(self._hass, delay, self._run_job)
+
+    async def _run_pending(self, now) -> None:
+        """Run the pending manager run."""
+
+        self._cancel_pending_run = None
+        self._last_run = time_monotonic()
+        await self.run()
+
     async def run(self) -> None:
         """Run the main logic of the PV Water Heating Manager."""
 
+        domain_data = self._hass.data[DOMAIN]
+        entry_data = self._entry.data
+
+        # Check if MQTT is connected (Solar through automatic configuration)
+        if self._solar_conf_mode == "automatic" and not domain_data["mqtt_connected"]:
+            _LOGGER.warning("MQTT is not connected")
+            return
+
         # Check if boiler is connected
-        boiler_connection = await self._get_sensor_state(self._entry.data["boiler_state"], "string")
-        manager_status = self._hass.data[DOMAIN]["manager_status_sensor"].state
+        boiler_connection = self._get_sensor_state(entry_data["boiler_state"], "string")
+        manager_status = domain_data["manager_status_sensor"].native_value
         if boiler_connection == "Disconnected":
             _LOGGER.warning("Boiler is disconnected")
             if manager_status != "Paused - Warning (Boiler Disconnected)":
-                self._hass.data[DOMAIN]["manager_status_sensor"].set_state("Paused - Warning (Boiler Disconnected)")
+                domain_data["manager_status_sensor"].set_state("Paused - Warning (Boiler Disconnected)")
             return
 
         # Return the manager status to the previous state, if it was paused due to the boiler disconnection
         if manager_status == "Paused - Warning (Boiler Disconnected)":
-            self._hass.data[DOMAIN]["manager_status_sensor"].set_state("Running")
-
-        # Check if MQTT is connected (Solar through automatic configuration)
-        if self._entry.data["solar_conf_mode"] == "automatic" and not self._hass.data[DOMAIN]["mqtt_connected"]:
-            _LOGGER.warning("MQTT is not connected")
-            return
+            domain_data["manager_status_sensor"].set_state("Running")
 
         # Run the boiler night pre-heating logic
         await self.night_pre_heating()
 
         # If automatic configuration is used, the phase is obtained from the MQTT data
-        phase = self._entry.data["phase"]
+        phase = entry_data["phase"]
         if not phase:
             _LOGGER.debug("Phase is not set (waiting for mqtt data)")
             return
 
         # Run the boiler control logic (only if night pre-heating is not heating)
-        if not self._hass.data[DOMAIN]["night_preheating"]:
+        if not domain_data["night_preheating"]:
             await self.boiler_logic()
 
     async def boiler_logic(self) -> None:
@@ -78,28 +233,25 @@ class PVWaterHeatingManager:
         After successfully obtaining all the necessary data, it will decide whether the boiler can be switched on or off.
         """
 
+        domain_data = self._hass.data[DOMAIN]
+        entry_data = self._entry.data
+
         # Get the phase which is suported by solar system (so logic can be applied to the correct phase)
-        phase = self._entry.data["phase"]
+        phase = entry_data["phase"]
 
         # Get values set in the configuration by the user
-        boiler_power = int(self._entry.data["boiler_power"])
-        battery_top_threshold = int(self._entry.data["battery_soc_top"])
-        battery_bottom_threshold = int(self._entry.data["battery_soc_bottom"])
-        grid_threshold = int(self._entry.data["grid_threshold"])
-
-        # Get the current state of the sensors
-        grid_power = await self._get_sensor_state(self._entry.data[f"grid_l{phase}"], "float")
-        critical_loads_history = await self._get_sensor_history(
-            self._entry.data["critical_load"], secs=30, percentile=50
-        )
-        pv_power_history = await self._get_sensor_history(
-            self._entry.data["pv_power"], mins=10, percentile=70
-        )  # History of last 10 minutes
-        critical_loads = await self._get_sensor_state(self._entry.data["critical_load"], "float")
-        battery_soc = await self._get_sensor_state(self._entry.data["battery_soc"], "float")
-        boiler_heating = self._hass.states.get(self._entry.data["boiler_heat"]).state
-        boiler_power_on = self._hass.data[DOMAIN]["boiler_power_on"]
-        boiler_temp_to_heat = self._hass.data[DOMAIN]["heating_temp"].state
+        boiler_power = self._boiler_rated_power
+        battery_top_threshold = self._battery_top_threshold
+        battery_bottom_threshold = self._battery_bottom_threshold
+        grid_threshold = self._grid_threshold
+
+        # Get the current state of the sensors (histories are fetched only after the battery and grid checks pass)
+        grid_power = self._get_sensor_state(entry_data[f"grid_l{phase}"], "float")
+        critical_loads = self._get_sensor_state(entry_data["critical_load"], "float")
+        battery_soc = self._get_sensor_state(entry_data["battery_soc"], "float")
+        boiler_heating = self._hass.states.get(entry_data["boiler_heat"]).state
+        boiler_power_on = domain_data["boiler_power_on"]
+        boiler_temp_to_heat = domain_data["heating_temp"].native_value
 
         # Check if boiler is heating
         if boiler_power_on:
@@ -123,31 +275,24 @@ class PVWaterHeatingManager:
                 await self._boiler_power(False)
                 return
 
-            # Boiler is turned on by manager, but it reached the desired temperature, so boiler's heat status is off
-            if boiler_heating == "off":
-                # PV should cover 70% of the critical loads (with boiler, boiler's heat status is off)
-                if pv_power_history < 0.7 * (critical_loads_history + boiler_power):
-                    # Check if it's not a false positive - critical loads now are lower
-                    if pv_power_history < 0.7 * (critical_loads + boiler_power):
-                        _LOGGER.debug(
-                            "BL(ON->OFF): PV is not generating enough to power the critical loads [%s/%s:%s]",
-                            pv_power_history,
-                            (0.7 * (critical_loads_history + boiler_power)),
-                            (0.7 * (critical_loads + boiler_power)),
-                        )
-                        await self._boiler_power(False)
-
-            # PV should cover 70% of the critical loads (with boiler, boiler's heat status is on)
-            elif pv_power_history < 0.7 * (critical_loads_history):
-                # Check if it's not a false positive - critical loads now are lower
-                if pv_power_history < 0.7 * (critical_loads):
-                    _LOGGER.debug(
-                        "BL(ON->OFF): PV is not generating enough to power the critical loads [%s/%s:%s]",
-                        pv_power_history,
-                        (0.7 * critical_loads_history),
-                        (0.7 * critical_loads),
-                    )
-                    await self._boiler_power(False)
+            critical_loads_history, pv_power_history = await self._get_load_and_pv_history()
+
+            # PV should cover 70% of the critical loads (with boiler)
+            # Boiler is turned on by manager, but if it reached the desired temperature, boiler's heat status is off
+            # and its power is not part of the critical loads, so it is added
+            boiler_load = boiler_power if boiler_heating == "off" else 0
+            pv_required = 0.7 * (critical_loads_history + boiler_load)
+            pv_required_now = 0.7 * (critical_loads + boiler_load)
+
+            # Check if it's not a false positive - critical loads now are lower
+            if pv_power_history < pv_required and pv_power_history < pv_required_now:
+                _LOGGER.debug(
+                    "BL(ON->OFF): PV is not generating enough to power the critical loads [%s/%s:%s]",
+                    pv_power_history,
+                    pv_required,
+                    pv_required_now,
+                )
+                await self._boiler_power(False)
 
         # Boiler is not heating
         else:
@@ -169,18 +314,37 @@ class PVWaterHeatingManager:
                 )
                 return
 
+            critical_loads_history, pv_power_history = await self._get_load_and_pv_history()
+
             # Solar system should generate enough power to cover 75% of the critical loads (+ boiler)
-            if pv_power_history < (0.75 * (critical_loads_history + boiler_power)):
+            pv_required = 0.75 * (critical_loads_history + boiler_power)
+            if pv_power_history < pv_required:
                 _LOGGER.debug(
                     "BL(OFF): PV is not generating enough to power the critical loads [%s:%s]",
                     pv_power_history,
-                    0.75 * (critical_loads_history + boiler_power),
+                    pv_required,
                 )
                 return
 
             # Start heating the water
             await self._boiler_power(True, boiler_temp_to_heat)
 
+    async def _get_load_and_pv_history(self) -> tuple[float | None, float | None]:
+        """Get the critical loads and PV power history (both histories are fetched concurrently).
+
+        Returns:
+            critical_loads_history: Median of the critical loads of the last 30 seconds
+            pv_power_history: 70th percentile of the PV power of the last 10 minutes
+
+        """
+
+        entry_data = self._entry.data
+
+        return await asyncio.gather(
+            self._get_sensor_history(entry_data["critical_load"], secs=30, percentile=50),
+            self._get_sensor_history(entry_data["pv_power"], mins=10, percentile=70),
+        )
+
     async def night_pre_heating(self) -> None:
         """Run the night pre-heating logic.
 
@@ -189,51 +353,54 @@ class PVWaterHeatingManager:
         Source of datetime calculation: https://stackoverflow.com/a/39651061
         """
 
+        domain_data = self._hass.data[DOMAIN]
+
         # Don't plan the night pre-heating if it's already planned, canceled, or in progress
-        night_heating_planned = self._hass.data[DOMAIN]["night_heating_planned"]
-        night_heating_calc_planned = self._hass.data[DOMAIN]["night_heating_calc_planned"]
-        night_heating_canceled = self._hass.data[DOMAIN]["night_heating_canceled"]
-        night_preheating = self._hass.data[DOMAIN]["night_preheating"]
+        night_heating_planned = domain_data["night_heating_planned"]
+        night_heating_calc_planned = domain_data["night_heating_calc_planned"]
+        night_heating_canceled = domain_data["night_heating_canceled"]
+        night_preheating = domain_data["night_preheating"]
 
         if night_heating_planned or night_heating_calc_planned or night_heating_canceled or night_preheating:
             return
 
         # If night pre-heating is disabled
-        night_heating = self._hass.data[DOMAIN]["night_heating_switch"].is_on
+        night_heating = domain_data["night_heating_switch"].is_on
         if not night_heating:
             return
 
         _LOGGER.debug("NPH: Running the night pre-heating logic (after checks)")
 
         # Calculate how long it takes to heat the water from 1C to the maximum temperature
-        boiler_volume = int(self._entry.data["boiler_volume"])
-        boiler_power = int(self._entry.data["boiler_power"])
+        boiler_volume = self._boiler_volume
+        boiler_power = self._boiler_rated_power
         water_min_temp = 1
-        preheat_temp = self._hass.data[DOMAIN]["night_heating_temp"].state
-        max_time_to_heat = await self._calculate_boiler_heat(boiler_power, boiler_volume, water_min_temp, preheat_temp)
+        preheat_temp = domain_data["night_heating_temp"].native_value
+        max_time_to_heat = self._calculate_boiler_heat(boiler_power, boiler_volume, water_min_temp, preheat_temp)
         max_time_to_heat = max_time_to_heat[1]
 
         # Set the time to plan the night pre-heating
-        datetime_now = dt_util.as_local(dt_util.utcnow())
-        morning_time = self._hass.data[DOMAIN]["morning_time_time"].time
-        planned_datetime1 = (
-            datetime.combine(date.today(), morning_time) - timedelta(minutes=max_time_to_heat)
-        ).replace(tzinfo=datetime_now.tzinfo)
+        datetime_now = dt_util.now()
+        date_today = datetime_now.date()
+        morning_time = domain_data["morning_time_time"].native_value
+        planned_datetime1 = datetime.combine(date_today, morning_time, tzinfo=datetime_now.tzinfo) - timedelta(
+            minutes=max_time_to_heat
+        )
         planned_time = planned_datetime1.time()
 
         # Check if planned time is not in the past, if so, plan it to next day
-        if self._planned_to_past(planned_datetime1):
+        if self._planned_to_past(planned_datetime1, datetime_now):
             _LOGGER.debug("NPH: Night pre-heating is planned in the past")
-            planned_datetime2 = datetime.combine(date.today() + timedelta(days=1), planned_time).replace(
-                tzinfo=datetime_now.tzinfo
+            planned_datetime2 = datetime.combine(
+                date_today + timedelta(days=1), planned_time, tzinfo=datetime_now.tzinfo
             )
         else:
-            planned_datetime2 = datetime.combine(date.today(), planned_time).replace(tzinfo=datetime_now.tzinfo)
+            planned_datetime2 = datetime.combine(date_today, planned_time, tzinfo=datetime_now.tzinfo)
 
-        self._hass.data[DOMAIN]["night_heating_calc_event"] = async_track_point_in_utc_time(
-            self._hass, self._plan_start_night_pre_heating, planned_datetime2
+        domain_data["night_heating_calc_event"] = async_track_point_in_utc_time(
+            self._hass, self._plan_job, planned_datetime2
         )
-        self._hass.data[DOMAIN]["night_heating_calc_planned"] = True
+        domain_data["night_heating_calc_planned"] = True
 
         _LOGGER.debug(
             "NPH: Night pre-heating logic finished, night pre-heating calculation planned [%s]", planned_time
@@ -247,26 +414,32 @@ class PVWaterHeatingManager:
         5 hours before, and schedules the start of heating well in advance.
         """
 
+        domain_data = self._hass.data[DOMAIN]
+        entry_data = self._entry.data
+
         _LOGGER.debug("PNPH: Planning the night pre-heating")
 
         # Cancel the night pre-heating calculation event
-        with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-            self._hass.data[DOMAIN]["night_heating_calc_event"]()
+        cancel_event = domain_data.pop("night_heating_calc_event", None)
+        if cancel_event is not None:
+            cancel_event()
 
         # Selects the lowest temperature from the current temperature or the lowest temperature for yesterday
-        morning_time = self._hass.data[DOMAIN]["morning_time_time"].time
-        yesterday_morning_time = datetime.combine(datetime.now().date() - timedelta(days=1), morning_time)
+        morning_time = domain_data["morning_time_time"].native_value
+        yesterday_morning_time = dt_util.as_local(now).replace(
+            hour=morning_time.hour, minute=morning_time.minute, second=0, microsecond=0
+        ) - timedelta(days=1)
         yesterday_boiler_temp = await self._get_sensor_history(
-            self._entry.data["boiler_temp2"], mins=300, s_time=yesterday_morning_time, min_val=True
+            entry_data["boiler_temp2"], mins=300, s_time=yesterday_morning_time, min_val=True
         )  # Yesterday's minimum boiler temp from 5 hours before the morning time to the morning time
-        boiler_temp_now = await self._get_sensor_state(self._entry.data["boiler_temp2"], "float")
+        boiler_temp_now = self._get_sensor_state(entry_data["boiler_temp2"], "float")
         calc_temp = min(yesterday_boiler_temp, boiler_temp_now)  # Use the lower temperature
 
         # Calculate the time to heat the water
-        boiler_power = int(self._entry.data["boiler_power"])
-        boiler_volume = int(self._entry.data["boiler_volume"])
-        preheat_temp = self._hass.data[DOMAIN]["night_heating_temp"].state
-        boiler_heat = await self._calculate_boiler_heat(boiler_power, boiler_volume, calc_temp, preheat_temp)
+        boiler_power = self._boiler_rated_power
+        boiler_volume = self._boiler_volume
+        preheat_temp = domain_data["night_heating_temp"].native_value
+        boiler_heat = self._calculate_boiler_heat(boiler_power, boiler_volume, calc_temp, preheat_temp)
 
         # If boiler heat is 0, the water is already heated to desired temperature
         # But plan preheat 2 hours before the morning time to check if the water is still heated to the desired temperature
@@ -285,24 +458,22 @@ class PVWaterHeatingManager:
         )
 
         # Check if planned time is not in the past, if so start the night pre-heating now
-        datetime_now = dt_util.as_local(dt_util.utcnow())
-        planned_datetime = (datetime.combine(date.today(), morning_time) - timedelta(minutes=needed_time)).replace(
-            tzinfo=datetime_now.tzinfo
+        datetime_now = dt_util.now()
+        planned_datetime = datetime.combine(datetime_now.date(), morning_time, tzinfo=datetime_now.tzinfo) - timedelta(
+            minutes=needed_time
         )
         planned_time = planned_datetime.time()
 
-        if self._planned_to_past(planned_datetime):
-            self._hass.data[DOMAIN]["night_heating_planned"] = True
+        if self._planned_to_past(planned_datetime, datetime_now):
+            domain_data["night_heating_planned"] = True
             await self._start_night_pre_heating(None)
         else:
             # Plan the night pre-heating
-            self._hass.data[DOMAIN]["night_heating_event"] = async_track_time_change(
-                self._hass, self._start_night_pre_heating, hour=planned_time.hour, minute=planned_time.minute, second=0
-            )
-            self._hass.data[DOMAIN]["night_heating_planned"] = True
+            domain_data["night_heating_event"] = self._call_at(self._start_job, planned_time)
+            domain_data["night_heating_planned"] = True
 
         # Remove the planned calculation
-        self._hass.data[DOMAIN]["night_heating_calc_planned"] = False
+        domain_data["night_heating_calc_planned"] = False
 
         _LOGGER.debug("PNPH: Planning the night pre-heating finished")
 
@@ -314,52 +485,43 @@ class PVWaterHeatingManager:
         If planning started too early, reschedule for later, closer to morning time. At the end, schedule the end of the pre-heating.
         """
 
+        domain_data = self._hass.data[DOMAIN]
+        entry_data = self._entry.data
+
         _LOGGER.debug("SNPH: Starting the night pre-heating")
 
         # Cancel the night pre-heating event
-        with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-            self._hass.data[DOMAIN]["night_heating_event"]()
+        cancel_event = domain_data.pop("night_heating_event", None)
+        if cancel_event is not None:
+            cancel_event()
 
         # Check if water is already heated to the desired temperature (- 3C)
-        boiler_water_temp = await self._get_sensor_state(self._entry.data["boiler_temp2"], "float")
+        boiler_water_temp = self._get_sensor_state(entry_data["boiler_temp2"], "float")
         boiler_water_temp -= 3  # 3C reserve (cca 1C drop every 2 hours)
-        preheat_temp = self._hass.data[DOMAIN]["night_heating_temp"].state
+        preheat_temp = domain_data["night_heating_temp"].native_value
 
-        morning_time = self._hass.data[DOMAIN]["morning_time_time"].time
+        # Today's morning time (current time is taken once for the whole start)
+        morning_time = domain_data["morning_time_time"].native_value
+        datetime_now = dt_util.now()
+        morning_datetime = datetime.combine(datetime_now.date(), morning_time, tzinfo=datetime_now.tzinfo)
 
         if boiler_water_temp >= preheat_temp:
             _LOGGER.debug("SNPH: Water is already heated to the desired temperature")
 
             # Plan to "end" the night pre-heating, so new heating can be planned after
-            self._hass.data[DOMAIN]["night_heating_canceled"] = True
-
-            # Check if planned time is not in the past
-            check_planned_datetime = datetime.combine(date.today(), morning_time)
-
-            if self._planned_to_past(check_planned_datetime):
-                # Remove the planned heating
-                self._hass.data[DOMAIN]["night_heating_planned"] = False
-
-                await self._end_pre_heating(None)
-            else:
-                self._hass.data[DOMAIN]["night_heating_event"] = async_track_time_change(
-                    self._hass, self._end_pre_heating, hour=morning_time.hour, minute=morning_time.minute, second=0
-                )
-
-                # Remove the planned heating
-                self._hass.data[DOMAIN]["night_heating_planned"] = False
+            domain_data["night_heating_canceled"] = True
+            # End the pre-heating now or at the morning time
+            await self._end_pre_heating_at_morning(morning_datetime, datetime_now)
             return
 
         # Check how long it takes to heat the water
-        boiler_power = int(self._entry.data["boiler_power"])
-        boiler_volume = int(self._entry.data["boiler_volume"])
-        boiler_heat = await self._calculate_boiler_heat(boiler_power, boiler_volume, boiler_water_temp, preheat_temp)
+        boiler_power = self._boiler_rated_power
+        boiler_volume = self._boiler_volume
+        boiler_heat = self._calculate_boiler_heat(boiler_power, boiler_volume, boiler_water_temp, preheat_temp)
         needed_time = boiler_heat[1]  # In minutes
 
-        # Check how much time is left until the morning
-        time_now = dt_util.as_local(dt_util.utcnow())
-        morning_time2 = datetime.combine(date.today(), morning_time).replace(tzinfo=time_now.tzinfo)
-        time_left = (morning_time2 - time_now).seconds // 60  # In minutes
+        # Check how much time is left until the morning (morning time is tomorrow if it has already passed today)
+        time_left = int((morning_datetime - datetime_now).total_seconds() // 60) % 1440  # In minutes
 
         time_difference = time_left - needed_time
 
@@ -369,54 +531,37 @@ class PVWaterHeatingManager:
             _LOGGER.debug("SNPH: Rescheduling the night pre-heating to earlier time")
 
             # Calculate the new time to start the night pre-heating
-            planned_time = (time_now + timedelta(minutes=time_difference)).time()
+            planned_time = (datetime_now + timedelta(minutes=time_difference)).time()
 
             # Reschedule the night pre-heating
-            self._hass.data[DOMAIN]["night_heating_event"] = async_track_time_change(
-                self._hass, self._start_night_pre_heating, hour=planned_time.hour, minute=planned_time.minute, second=0
-            )
+            domain_data["night_heating_event"] = self._call_at(self._start_job, planned_time)
             return
 
         # Check if boiler is connected, if not, cancel the night pre-heating
-        boiler_connection = await self._get_sensor_state(self._entry.data["boiler_state"], "string")
+        boiler_connection = self._get_sensor_state(entry_data["boiler_state"], "string")
         if boiler_connection == "Disconnected":
             _LOGGER.warning("SNPH: Boiler is disconnected")
-            self._hass.data[DOMAIN]["night_heating_canceled"] = True
-
-            # Check if planned time is not in the past
-            check_planned_datetime = datetime.combine(date.today(), morning_time)
-
-            if self._planned_to_past(check_planned_datetime):
-                # Remove the planned heating
-                self._hass.data[DOMAIN]["night_heating_planned"] = False
-                await self._end_pre_heating(None)
-            else:
-                self._hass.data[DOMAIN]["night_heating_event"] = async_track_time_change(
-                    self._hass, self._end_pre_heating, hour=morning_time.hour, minute=morning_time.minute, second=0
-                )
-
-                # Remove the planned heating
-                self._hass.data[DOMAIN]["night_heating_planned"] = False
+            domain_data["night_heating_canceled"] = True
+            # End the pre-heating now or at the morning time
+            await self._end_pre_heating_at_morning(morning_datetime, datetime_now)
 
             return
 
         # Check if manager is in automatic mode, so pre-heating is controlled by the manager, based on forecast
-        manager_status = self._hass.data[DOMAIN]["manager_status_select"].state
+        manager_status = domain_data["manager_status_select"].current_option
         if manager_status == "Automatic":
-            heating_temp = self._hass.data[DOMAIN]["heating_temp"].state  # Heating temperature (Day) set by the user
-            temp_variation = self._entry.data["temp_variable"]  # Temperature variation set by the user
-            min_boiler_temp = self._entry.data["boiler_min_temp"]  # Minimum boiler temperature
-            battery_soc = await self._get_sensor_state(self._entry.data["battery_soc"], "int")
-            battery_capacity = int(self._entry.data["battery_capacity"])  # Battery capacity in Wh
-            battery_threshold_top = self._entry.data["battery_soc_top"]  # Battery top threshold
-
-            morning_time_check = datetime.combine(date.today(), morning_time)
+            heating_temp = domain_data["heating_temp"].native_value  # Heating temperature (Day) set by the user
+            temp_variation = self._temp_variation  # Temperature variation set by the user
+            min_boiler_temp = self._boiler_min_temp  # Minimum boiler temperature
+            battery_soc = self._get_sensor_state(entry_data["battery_soc"], "int")
+            battery_capacity = self._battery_capacity  # Battery capacity in Wh
+            battery_threshold_top = self._battery_top_threshold  # Battery top threshold
 
             # Get forecasted PV generation, today's forecast if it's before the morning time, tomorrow's forecast if it's after
-            if self._planned_to_past(morning_time_check):
-                pv_forecast = self._hass.data[DOMAIN]["pv_generation_forecast_tomorrow_sensor"].state
+            if self._planned_to_past(morning_datetime, datetime_now):
+                pv_forecast = domain_data["pv_generation_forecast_tomorrow_sensor"].native_value
             else:
-                pv_forecast = self._hass.data[DOMAIN]["pv_generation_forecast_today_sensor"].state
+                pv_forecast = domain_data["pv_generation_forecast_today_sensor"].native_value
 
             # Calculate minimum temperature to heat the water to (heating temperature - variation can be lower than the minimum boiler temperature)
             # Calculate the difference between the minimum temperature and the pre-heat temperature
@@ -424,27 +569,16 @@ class PVWaterHeatingManager:
             delta_temp = max(min_temp - preheat_temp, 0)
 
             # Calculate the energy needed to heat the water from the pre-heat temperature to the minimum temperature throughout the day
+            # (energy is linear in the temperature difference, so only the energy per °C is needed)
             # Calculate the energy needed to charge the battery to the top threshold
-            boiler_energy_day = await self._calculate_boiler_heat(
-                boiler_power, boiler_volume, preheat_temp, delta_temp
-            )
-            battery_energy = await self._calculate_battery_energy(battery_capacity, battery_soc, battery_threshold_top)
+            boiler_energy_day = round(_K_PT * boiler_volume * delta_temp, 2)  # In kWh
+            battery_energy = self._calculate_battery_energy(battery_capacity, battery_soc, battery_threshold_top)
 
             # If calculated energy is not enough to heat the water and charge the battery, cancel the night pre-heating
-            if boiler_energy_day[0] + battery_energy > pv_forecast / 1000:
-                self._hass.data[DOMAIN]["night_heating_canceled"] = True
-
-                # Check if planned time is not in the past
-                check_planned_datetime = datetime.combine(date.today(), morning_time)
-
-                if self._planned_to_past(check_planned_datetime):
-                    self._hass.data[DOMAIN]["night_heating_planned"] = False
-                    await self._end_pre_heating(None)
-                else:
-                    self._hass.data[DOMAIN]["night_heating_event"] = async_track_time_change(
-                        self._hass, self._end_pre_heating, hour=morning_time.hour, minute=morning_time.minute, second=0
-                    )
-                    self._hass.data[DOMAIN]["night_heating_planned"] = False
+            if boiler_energy_day + battery_energy > pv_forecast / 1000:
+                domain_data["night_heating_canceled"] = True
+                # End the pre-heating now or at the morning time
+                await self._end_pre_heating_at_morning(morning_datetime, datetime_now)
 
                 _LOGGER.debug("SNPH: Pre-heating is not planned (not enough energy)")
                 return
@@ -452,27 +586,34 @@ class PVWaterHeatingManager:
             _LOGGER.debug("SNPH: Pre-heat can be started - Automatic mode")
 
         # Start the night pre-heating
-        self._hass.data[DOMAIN]["night_preheating"] = True
+        domain_data["night_preheating"] = True
         await self._boiler_power(True, preheat_temp)
+        # End the pre-heating now or at the morning time
+        await self._end_pre_heating_at_morning(morning_datetime, datetime_now)
 
-        # Check if planned time is not in the past
-        check_planned_datetime = datetime.combine(date.today(), morning_time)
+        _LOGGER.debug("SNPH: Night pre-heating started")
 
-        if self._planned_to_past(check_planned_datetime):
-            # Remove the planned heating
-            self._hass.data[DOMAIN]["night_heating_planned"] = False
+    async def _end_pre_heating_at_morning(self, morning_datetime: datetime, datetime_now: datetime) -> None:
+        """End the night pre-heating now if the morning time is in the past, otherwise schedule it to the morning time.
 
-            await self._end_pre_heating(None)
-        else:
-            # Plan end of the night pre-heating
-            self._hass.data[DOMAIN]["night_heating_event"] = async_track_time_change(
-                self._hass, self._end_pre_heating, hour=morning_time.hour, minute=morning_time.minute, second=0
-            )
+        The planned heating is removed in both cases, so new heating can be planned after.
+
+        Args:
+            morning_datetime: Today's morning time (local timezone)
+            datetime_now: Current local datetime
 
-            # Remove the planned heating
-            self._hass.data[DOMAIN]["night_heating_planned"] = False
+        """
 
-        _LOGGER.debug("SNPH: Night pre-heating started")
+        domain_data = self._hass.data[DOMAIN]
+
+        # Remove the planned heating
+        domain_data["night_heating_planned"] = False
+
+        # Check if planned time is not in the past
+        if self._planned_to_past(morning_datetime, datetime_now):
+            await self._end_pre_heating(None)
+        else:
+            domain_data["night_heating_event"] = self._call_at(self._end_job, morning_datetime.time())
 
     async def _end_pre_heating(self, now) -> None:
         """End the night pre-heating.
@@ -481,15 +622,18 @@ class PVWaterHeatingManager:
         Or it will clean cancelation if the night pre-heating was canceled.
         """
 
+        domain_data = self._hass.data[DOMAIN]
+
         _LOGGER.debug("EPH: End the night pre-heating")
 
         # Cancel the night pre-heating
-        with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-            self._hass.data[DOMAIN]["night_heating_event"]()
+        cancel_event = domain_data.pop("night_heating_event", None)
+        if cancel_event is not None:
+            cancel_event()
 
         # Clean cancelation
-        if self._hass.data[DOMAIN]["night_heating_canceled"]:
-            self._hass.data[DOMAIN]["night_heating_canceled"] = False
+        if domain_data["night_heating_canceled"]:
+            domain_data["night_heating_canceled"] = False
             _LOGGER.debug("EPH: Night pre-heating canceled")
             return
 
@@ -497,11 +641,11 @@ class PVWaterHeatingManager:
         await self._boiler_power(False)
 
         # Remove the planned heating
-        self._hass.data[DOMAIN]["night_preheating"] = False
+        domain_data["night_preheating"] = False
 
         _LOGGER.debug("EPH: Night pre-heating ended")
 
-    async def _get_sensor_state(self, entity_id, type=None) -> str | float | int | None:
+    def _get_sensor_state(self, entity_id, type=None) -> str | float | int | None:
         """Get the state of the sensor.
 
         Args:
@@ -515,27 +659,57 @@ class PVWaterHeatingManager:
 
         _LOGGER.debug("GSS: Getting the state of the sensor %s", entity_id)
 
-        if type == "string":
-            ret = str(self._hass.states.get(entity_id).state)
-        elif type == "float":
-            ret = float(self._hass.states.get(entity_id).state)
-        elif type == "int":
-            ret = int(self._hass.states.get(entity_id).state)
-        else:
-            ret = self._hass.states.get(entity_id).state
-
-        return ret
+        return _STATE_CONVERTERS[type](self._hass.states.get(entity_id).state)
 
     async def _get_sensor_history(
         self, entity_id, s_time=None, mins: int = 0, secs: int = 0, min_val: bool = False, percentile: int = None
     ) -> float | None:
         """Get the mean value of the sensor history, calculated from the last X minutes.
 
+        Results are cached, so repeated calls don't query the recorder again.
+        The history of a fixed time window (s_time) is cached for an hour, or for a day if the window has already ended
+        (the past doesn't change, e.g. yesterday's minimum for the repeated night pre-heating planning).
+        The history of the last X minutes is cached for 1/20 of the window (e.g. 30 seconds for 10 minutes).
+
+        Args: Same as _fetch_sensor_history
+
+        Return:
+            mean_value | min_value | percentile_value: Mean, min or percentile value of the sensor history
+
+        """
+
+        key = (entity_id, s_time, mins, secs, min_val, percentile)
+        now = time_monotonic()
+
+        cached = self._history_cache.get(key)
+        if cached is not None and cached[0] > now:
+            _LOGGER.debug("GSH: Using cached history of %s", entity_id)
+            return cached[1]
+
+        value = await self._fetch_sensor_history(entity_id, s_time, mins, secs, min_val, percentile)
+
+        # Remove expired results and store the new one
+        self._history_cache = {k: v for k, v in self._history_cache.items() if v[0] > now}
+        if s_time:
+            s_time_utc = s_time if s_time.tzinfo is not None else s_time.replace(tzinfo=dt_util.UTC)
+            ttl = _HISTORY_CACHE_PAST_TTL if s_time_utc < dt_util.utcnow() else _HISTORY_CACHE_FIXED_TTL
+        else:
+            ttl = (mins * 60 + secs) / 20
+        self._history_cache[key] = (now + ttl, value)
+
+        return value
+
+    async def _fetch_sensor_history(
+        self, entity_id, s_time=None, mins: int = 0, secs: int = 0, min_val: bool = False, percentile: int = None
+    ) -> float | None:
+        """Get the mean value of the sensor history from the recorder, calculated from the last X minutes.
+
         If s_time is provided, the history will be calculated from that time.
+        Minimum value over a window of at least 5 minutes is taken from the recorder statistics, if the sensor has them.
 
         Args:
             entity_id: Entity ID of the sensor
-            s_time: Specific time to calculate the history from
+            s_time: Specific time to calculate the history from (naive datetime is considered to be in UTC)
             mins: Number of minutes to go back in history
             secs: Number of seconds to go back in history
             min_val: If it is set, minimum value of the sensor history will be returned
@@ -546,78 +720,207 @@ class PVWaterHeatingManager:
 
         Source:
                 https://www.home-assistant.io/integrations/history/
+                https://data.home-assistant.io/docs/statistics/
                 https://numpy.org/doc/stable/reference/generated/numpy.percentile.html
 
         """
 
         _LOGGER.debug("GSH: Getting the sensor history of %s", entity_id)
 
-        def _is_float(value):
-            """Check if string can be converted to float."""
-            try:
-                float(value)
-                return True
-            except ValueError:
-                return False
-
         if s_time:
-            s_time = s_time.replace(tzinfo=dt_util.UTC)
+            # Timezone aware datetimes are used as they are, naive datetimes are considered to be in UTC
+            if s_time.tzinfo is None:
+                s_time = s_time.replace(tzinfo=dt_util.UTC)
             start_time = s_time - timedelta(minutes=mins, seconds=secs)
             end_time = s_time
         else:
-            start_time = dt_util.utcnow() - timedelta(minutes=mins, seconds=secs)
             end_time = dt_util.utcnow()
+            start_time = end_time - timedelta(minutes=mins, seconds=secs)
 
         _LOGGER.debug("GSH: Start time %s, End time %s", start_time, end_time)
 
-        sensor_history = await self._hass.async_add_executor_job(
-            lambda: history.get_significant_states(
+        # Minimum over a longer window can be read from the recorder's 5-minute statistics (pre-aggregated rows)
+        if min_val and not percentile and end_time - start_time >= timedelta(minutes=5):
+            statistics = await self._hass.async_add_executor_job(
+                statistics_during_period,
                 self._hass,
                 start_time,
                 end_time,
-                [entity_id],
-                include_start_time_state=True,
-                significant_changes_only=False,
+                {entity_id},
+                "5minute",
+                None,
+                {"min"},
             )
-        )
+            min_values = [row["min"] for row in statistics.get(entity_id, []) if row.get("min") is not None]
+            if min_values:
+                min_value = min(min_values)
+                _LOGGER.debug("GSH: Min value from statistics %s", min_value)
+                return round(min_value, 2)
+
+            # Sensor has no long-term statistics (no state class), use the state history
+            _LOGGER.debug("GSH: No statistics for %s, using the state history", entity_id)
+
+        # History of the last X minutes is kept in a buffer and only topped up with the new states
+        if s_time:
+            numeric_states = [value for _, value in await self._fetch_numeric_states(entity_id, start_time, end_time)]
+        else:
+            numeric_states = await self._rolling_numeric_states(entity_id, start_time, end_time)
+
+        _LOGGER.debug("GSH: Numeric states %s", numeric_states)
+
+        # Calculate selected value from the history (states are converted to an array only once)
+        if numeric_states:
+            states = np.fromiter(numeric_states, dtype=np.float64, count=len(numeric_states))
+
+            if percentile:
+                # Calculate the percentile value (linear interpolation between the two closest ranks, as np.percentile)
+                # Only the two ranks are selected with np.partition (O(n)), instead of sorting the whole array
+                rank = (len(states) - 1) * percentile / 100
+                lower = int(rank)
+                upper = min(lower + 1, len(states) - 1)
+                selected = np.partition(states, (lower, upper))
+                percentile_value = float(selected[lower] + (selected[upper] - selected[lower]) * (rank - lower))
+                _LOGGER.debug("GSH: Percentile value %s", percentile_value)
+                return round(percentile_value, 2)
+
+            if min_val:
+                # Return min value
+                min_value = float(states.min())
+                _LOGGER.debug("GSH: Min value %s", min_value)
+                return round(min_value, 2)
+
+            # Calculate the mean value
+            mean_value = float(states.mean())
+            _LOGGER.debug("GSH: Mean value %s", mean_value)
+            return round(mean_value, 2)
+
+        return None
+
+    async def _rolling_numeric_states(self, entity_id, start_time: datetime, end_time: datetime) -> list[float]:
+        """Get the numeric states of the sensor from the buffer of the rolling window, topped up from the recorder.
+
+        State changes of the sensors tracked by the manager are recorded in memory from the first request, once they
+        cover the whole window, the recorder is not queried at all.
+        Otherwise the first call fetches the whole window, next calls fetch only the states since the last call (with
+        a small overlap, because the recorder commits the states with a delay) and drop the states that left the window.
+
+        Args:
+            entity_id: Entity ID of the sensor
+            start_time: Start of the window
+            end_time: End of the window
 
-        sensor_history = sensor_history.get(entity_id)
+        Returns:
+            Numeric states of the window (including the state at the start of the window)
+
+        """
 
-        # Process the history data
-        if sensor_history:
-            # Get all states from sensor history to list
-            states = [state.state for state in sensor_history]
-            # Convert only numeric states to floats
-            numeric_states = [float(s) for s in states if s.isdigit() or _is_float(s)]
+        # Tracked sensor, its state changes are recorded in memory from the first request
+        if entity_id in self._tracked_entities:
+            live_states = self._live_states.get(entity_id)
+            if live_states is None:
+                live_states = self._live_states[entity_id] = deque()
+                self._append_live_state(live_states, self._hass.states.get(entity_id))
+
+            window = (end_time - start_time).total_seconds()
+            self._live_windows[entity_id] = max(self._live_windows.get(entity_id, 0), window)
+
+            # Recorded states cover the whole window (the state at the start of the window is known)
+            start_ts = start_time.timestamp()
+            if live_states and live_states[0][0] <= start_ts:
+                numeric_states = []
+                for timestamp, value in reversed(live_states):
+                    if value is not None:
+                        numeric_states.append(value)
+                    if timestamp <= start_ts:
+                        break
+                return numeric_states
+
+        key = (entity_id, end_time - start_time)
+        buffered = self._history_buffers.get(key)
+
+        # Nothing buffered yet or the last fetch is older than the window, fetch the whole window
+        if buffered is None or buffered[1] < start_time:
+            states = deque(await self._fetch_numeric_states(entity_id, start_time, end_time))
+        else:
+            states = buffered[0]
+            top_up_time = max(buffered[1] - _HISTORY_TOP_UP_OVERLAP, start_time)
+            top_up_ts = top_up_time.timestamp()
+
+            # States from the overlap are replaced by the fetched ones
+            while states and states[-1][0] >= top_up_ts:
+                states.pop()
+            states.extend(
+                await self._fetch_numeric_states(entity_id, top_up_time, end_time, include_start_time_state=False)
+            )
 
-            _LOGGER.debug("GSH: Numeric states %s", numeric_states)
+        # Drop the states which left the window, but keep the last one before it (state at the start of the window)
+        start_ts = start_time.timestamp()
+        while len(states) > 1 and states[1][0] <= start_ts:
+            states.popleft()
 
-            # Calculate selected value from the history
-            if numeric_states:
-                if percentile:
-                    # Calculate the percentile value
-                    percentile_value = np.percentile(numeric_states, percentile)
-                    _LOGGER.debug("GSH: Percentile value %s", percentile_value)
-                    return round(percentile_value, 2)
+        self._history_buffers[key] = (states, end_time)
 
-                if min_val:
-                    # Return min value
-                    min_value = min(numeric_states)
-                    _LOGGER.debug("GSH: Min value %s", min_value)
-                    return round(min_value, 2)
+        return [value for _, value in states]
 
-                # Calculate the mean value
-                mean_value = sum(numeric_states) / len(numeric_states)
-                _LOGGER.debug("GSH: Mean value %s", mean_value)
-                return round(mean_value, 2)
+    @staticmethod
+    def _append_live_state(live_states: deque, state) -> None:
+        """Append the state to the recorded states as (timestamp, value), value is None for non-numeric states."""
 
-        return None
+        if state is None:
+            return
+
+        try:
+            value = float(state.state)
+        except ValueError:
+            value = None
+        live_states.append((state.last_updated.timestamp(), value))
+
+    async def _fetch_numeric_states(
+        self, entity_id, start_time: datetime, end_time: datetime, include_start_time_state: bool = True
+    ) -> list[tuple[float, float]]:
+        """Get the numeric states of the sensor from the recorder.
+
+        Args:
+            entity_id: Entity ID of the sensor
+            start_time: Start of the history
+            end_time: End of the history
+            include_start_time_state: If it is set, the state at the start time is included
+
+        Returns:
+            List of (timestamp, value) of the numeric states (each state is parsed once)
+
+        """
+
+        sensor_history = await self._hass.async_add_executor_job(
+            partial(
+                history.get_significant_states,
+                self._hass,
+                start_time,
+                end_time,
+                [entity_id],
+                include_start_time_state=include_start_time_state,
+                significant_changes_only=True,
+            )
+        )
+
+        numeric_states = []
+        for state in sensor_history.get(entity_id, ()):
+            try:
+                numeric_states.append((state.last_updated.timestamp(), float(state.state)))
+            except ValueError:
+                continue
+
+        return numeric_states
 
-    async def _calculate_boiler_heat(
-        self, boiler_power: int, boiler_volume: int, water_temp: float, temp_to_heat: int
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _calculate_boiler_heat(
+        boiler_power: int, boiler_volume: int, water_temp: float, temp_to_heat: int
     ) -> tuple[float, float]:
         """Calculate the power and time to heat the water in the boiler.
 
+        The result depends only on the arguments, so it is cached.
+
         Formula:
             Pt = (4.186 × L × dT ) ÷ 3600
             Pt_time = Pt / Power
@@ -642,9 +945,6 @@ class PVWaterHeatingManager:
             Pt_time: Time to heat the water in minutes
 
         """
-        _LOGGER.debug(
-            "CBH: Calculating the boiler power %s %s %s %s", boiler_power, boiler_volume, water_temp, temp_to_heat
-        )
 
         # Check if boiler volume or power is 0
         if not boiler_volume or not boiler_power:
@@ -655,16 +955,19 @@ class PVWaterHeatingManager:
         if water_temp >= temp_to_heat:
             return 0, 0
 
-        Pt = (4.186 * boiler_volume * (temp_to_heat - water_temp)) / 3600  # Thermal power in kWh
-        Pt_time = Pt / (boiler_power / 1000) * 60  # Time to heat the water in minutes
+        heat = boiler_volume * (temp_to_heat - water_temp)
+        Pt = _K_PT * heat  # Thermal power in kWh
+        Pt_time = _K_PT_TIME * heat / boiler_power  # Time to heat the water in minutes
 
         return round(Pt, 2), round(Pt_time, 2)
 
-    async def _calculate_battery_energy(
-        self, battery_capacity: int, battery_soc: int, battery_to_charge: int = 80
-    ) -> float:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _calculate_battery_energy(battery_capacity: int, battery_soc: int, battery_to_charge: int = 80) -> float:
         """Calculate the energy needed to charge the battery from the current state of charge to the desired state of charge.
 
+        The result depends only on the arguments, so it is cached.
+
         Args:
             battery_capacity: Capacity of the battery in Wh
             battery_soc: Current state of charge of the battery in %
@@ -675,8 +978,6 @@ class PVWaterHeatingManager:
 
         """
 
-        _LOGGER.debug("CBE: Calculating the battery energy %s %s %s", battery_capacity, battery_soc, battery_to_charge)
-
         # Check if battery capacity is 0
         if not battery_capacity:
             _LOGGER.error("Battery capacity is 0")
@@ -694,71 +995,114 @@ class PVWaterHeatingManager:
     async def _boiler_power(self, power, temp=None) -> None:
         """Change the state and temperature of the boiler."""
 
+        domain_data = self._hass.data[DOMAIN]
+
         _LOGGER.debug("BPower: Changing the state of the boiler %s %s", power, temp)
 
-        boiler_thermostat = self._entry.data["boiler_thermostat"]  # ID of the thermostat
-        boiler_mode = self._entry.data["boiler_mode"]  # ID of the mode selector
+        boiler_thermostat = self._boiler_thermostat  # ID of the thermostat
+        boiler_mode = self._boiler_mode  # ID of the mode selector
 
         # Turn on boiler with the desired temperature
         if power:
-            # Set temperature
-            await self._hass.services.async_call(
-                "climate",
-                "set_temperature",
-                {"entity_id": boiler_thermostat, "temperature": temp},
-                blocking=True,
-            )
-
-            # Set mode to heat ("MANUAL")
-            await self._hass.services.async_call(
-                "select",
-                "select_option",
-                {"entity_id": boiler_mode, "option": "MANUAL"},
-                blocking=True,
+            # Set temperature and mode to heat ("MANUAL"), the thermostat and the mode selector are independent
+            await asyncio.gather(
+                self._hass.services.async_call(
+                    "climate",
+                    "set_temperature",
+                    {"entity_id": boiler_thermostat, "temperature": temp},
+                    blocking=True,
+                ),
+                self._hass.services.async_call(
+                    "select",
+                    "select_option",
+                    {"entity_id": boiler_mode, "option": "MANUAL"},
+                    blocking=True,
+                ),
             )
 
-            self._hass.data[DOMAIN]["boiler_power_on"] = True
+            domain_data["boiler_power_on"] = True
 
         # Turn off the boiler
         else:
-            # Set mode to off ("ANTIFREEZE")
+            # Set mode to off ("ANTIFREEZE"), nothing reads the mode right after, so the call is not awaited to finish
             await self._hass.services.async_call(
                 "select",
                 "select_option",
                 {"entity_id": boiler_mode, "option": "ANTIFREEZE"},
-                blocking=True,
+                blocking=False,
             )
 
-            self._hass.data[DOMAIN]["boiler_power_on"] = False
+            domain_data["boiler_power_on"] = False
 
-    def _planned_to_past(self, planned_datetime) -> bool:
+    def _call_at(self, job: HassJob, planned_time: time) -> CALLBACK_TYPE:
+        """Run the job once, at the next occurrence of the planned time (local time).
+
+        Args:
+            job: Job to run
+            planned_time: Time when the job should run (seconds are ignored)
+
+        Returns:
+            Callable to cancel the planned job.
+
+        """
+
+        datetime_now = dt_util.now()
+        planned_datetime = datetime_now.replace(
+            hour=planned_time.hour, minute=planned_time.minute, second=0, microsecond=0
+        )
+        if planned_datetime <= datetime_now:
+            planned_datetime += timedelta(days=1)
+
+        return async_call_later(self._hass, (planned_datetime - datetime_now).total_seconds(), job)
+
+    @staticmethod
+    def _planned_to_past(planned_datetime: datetime, datetime_now: datetime) -> bool:
         """Check if the planned time is in the past or if the difference between the planned time and current time is less than 5 minutes.
 
         Args:
-            planned_datetime: The planned datetime to check.
+            planned_datetime: The planned datetime to check (local timezone).
+            datetime_now: Current local datetime (taken once by the caller).
 
         Returns:
             bool: True if the planned time is in the past or if the difference between the planned time and current time is less than 5 minutes, False otherwise.
 
         """
 
-        datetime_now = dt_util.as_local(dt_util.utcnow())
-        time_now = datetime_now.time()
+        # Time of day is compared, so the date of the planned datetime doesn't matter
+        if planned_datetime.time() <= datetime_now.time():
+            return True
 
-        planned_datetime_new = planned_datetime.replace(tzinfo=datetime_now.tzinfo)
-        planned_time_new = planned_datetime_new.time()
+        # Seconds until the planned time of day, it is less than 5 minutes away or it has just passed around midnight
+        until_planned = (planned_datetime - datetime_now).total_seconds() % 86400
+        return until_planned < 300 or until_planned > 86100
 
-        if planned_time_new <= time_now or ((datetime_now - planned_datetime_new).seconds / 60 < 5):
-            return True
-        return False
+    async def set_manager_state(self, option: str, status: str) -> None:
+        """Set the manager control select option and the manager status, skipping the ones that are already set.
+
+        Args:
+            option: Option of the manager control select ("Automatic", "Manual", "Off")
+            status: State of the manager status sensor
+
+        """
+
+        domain_data = self._hass.data[DOMAIN]
+
+        manager_status_select = domain_data["manager_status_select"]
+        if manager_status_select.current_option != option:
+            await manager_status_select.async_select_option(option)
+
+        manager_status_sensor = domain_data["manager_status_sensor"]
+        if manager_status_sensor.native_value != status:
+            manager_status_sensor.set_state(status)
 
-    @callback
     async def grid_lost_handler(self, event) -> None:
         """Handle the grid lost state."""
 
+        domain_data = self._hass.data[DOMAIN]
+
         # Check if MQTT lost connection (Solar through automatic configuration)
         # If so, MQTT will handle this after 30s
-        if self._entry.data["solar_conf_mode"] == "automatic" and not self._hass.data[DOMAIN]["mqtt_connected"]:
+        if self._solar_conf_mode == "automatic" and not domain_data["mqtt_connected"]:
             return
 
         old_data = None
@@ -771,15 +1115,17 @@ class PVWaterHeatingManager:
 
         _LOGGER.debug("Grid lost handler - %s / %s", old_data, new_data)
 
+        # Only attributes have changed, grid state is the same
+        if old_data == new_data:
+            return
+
         # When component is loading, ignore the grid state (false positive)
-        if not self._hass.data[DOMAIN]["component_loading"]:
+        if not domain_data["component_loading"]:
             if new_data == "1":
                 _LOGGER.warning("Grid lost")
-                await self._hass.data[DOMAIN]["manager_status_select"].async_select_option("Off")
-                self._hass.data[DOMAIN]["manager_status_sensor"].set_state("Off - Warning (Grid Lost)")
+                await self.set_manager_state("Off", "Off - Warning (Grid Lost)")
             elif new_data not in ["0", "1"]:
                 _LOGGER.warning("Grid unknown")
-                await self._hass.data[DOMAIN]["manager_status_select"].async_select_option("Off")
-                self._hass.data[DOMAIN]["manager_status_sensor"].set_state("Off - Warning (Grid Unknown)")
+                await self.set_manager_state("Off", "Off - Warning (Grid Unknown)")
             else:
                 _LOGGER.warning("Grid back")
@@ -11,7 +11,7 @@ import logging
 
 from homeassistant.components.number import NumberEntity, RestoreNumber
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant
 
 from .const import DOMAIN
 
@@ -45,43 +45,40 @@ class NightHeatingTemp(RestoreNumber, NumberEntity):
     It has a range from min_temp to max_temp, which are taken from boiler settings.
     """
 
+    _attr_native_step = 1.0
+    _attr_native_unit_of_measurement = "°C"
+    _attr_should_poll = False
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the number entity with default values."""
         self._hass = hass
         self._entry = entry
         self._attr_unique_id = "pvwhc_night_heating_temp"
-        self.native_value = entry.data["boiler_min_temp"]
-        self.native_step = 1.0
-        self.native_max_value = entry.data["boiler_max_temp"]
-        self.native_min_value = entry.data["boiler_min_temp"]
-        self.native_unit_of_measurement = "°C"
+        self._attr_name = "Night Heating Temperature"
+        self._attr_native_value = entry.data["boiler_min_temp"]
+        self._attr_native_max_value = entry.data["boiler_max_temp"]
+        self._attr_native_min_value = entry.data["boiler_min_temp"]
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass."""
 
         # Get the last state of the number and check if it is in the range
         ret = await self.async_get_last_number_data()
-        if ret and not ret.native_value < self.native_min_value or ret.native_value > self.native_max_value:
-            self.native_value = ret.native_value
+        if ret and ret.native_value is not None and self.native_min_value <= ret.native_value <= self.native_max_value:
+            self._attr_native_value = ret.native_value
         else:
-            self.native_value = self.native_min_value
+            self._attr_native_value = self.native_min_value
 
         self.async_write_ha_state()
 
-    @property
-    def name(self) -> str:
-        """Return the name of the entity."""
-        return "Night Heating Temperature"
-
-    @property
-    def state(self) -> int | None:
-        """Return the state of the entity."""
-        return self.native_value
-
-    @callback
     async def _set_value(self, value) -> None:
         """Set the temperature."""
-        self.native_value = value
+
+        # Value is the same, nothing to update
+        if value == self.native_value:
+            return
+
+        self._attr_native_value = value
         self.async_write_ha_state()
 
     async def async_set_native_value(self, value) -> None:
@@ -96,41 +93,40 @@ class HeatingTemp(RestoreNumber, NumberEntity):
     The temperature is set in degrees Celsius.
     """
 
+    _attr_native_step = 1.0
+    _attr_native_unit_of_measurement = "°C"
+    _attr_should_poll = False
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the number entity with default values."""
         self._hass = hass
         self._entry = entry
         self._attr_unique_id = "pvwhc_heating_temp"
-        self.native_value = entry.data["boiler_min_temp"]
-        self.native_step = 1.0
-        self.native_max_value = entry.data["boiler_max_temp"]
-        self.native_min_value = entry.data["boiler_min_temp"]
-        self.native_unit_of_measurement = "°C"
+        self._attr_name = "Heating Temperature"
+        self._attr_native_value = entry.data["boiler_min_temp"]
+        self._attr_native_max_value = entry.data["boiler_max_temp"]
+        self._attr_native_min_value = entry.data["boiler_min_temp"]
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass."""
 
-        # Get the last states of the number
+        # Get the last state of the number and check if it is in the range
         ret = await self.async_get_last_number_data()
-        if ret:
-            self.native_value = ret.native_value
+        if ret and ret.native_value is not None and self.native_min_value <= ret.native_value <= self.native_max_value:
+            self._attr_native_value = ret.native_value
+        else:
+            self._attr_native_value = self.native_min_value
 
         self.async_write_ha_state()
 
-    @property
-    def name(self) -> str:
-        """Return the name of the entity."""
-        return "Heating Temperature"
-
-    @property
-    def state(self) -> int | None:
-        """Return the state of the entity."""
-        return self.native_value
-
-    @callback
     async def _set_value(self, value) -> None:
         """Set the temperature."""
-        self.native_value = value
+
+        # Value is the same, nothing to update
+        if value == self.native_value:
+            return
+
+        self._attr_native_value = value
 
         # Sync the value with the boiler temperature (but only if night heating is off)
         if not self._hass.data[DOMAIN]["night_preheating"]:
@@ -8,26 +8,35 @@ This platform creates three sensors:
 Source: https://developers.home-assistant.io/docs/core/entity/sensor
 """
 
-from datetime import datetime, timedelta
+import contextlib
 import logging
-from zoneinfo import ZoneInfo
-
-import async_timeout  # noqa: TID251
+from time import time as time_now
 
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.event import async_track_time_change
 from homeassistant.helpers.restore_state import RestoreEntity
-from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
 from .const import DOMAIN
-
-SCAN_INTERVAL = timedelta(hours=1)  # How often to fetch forecast data
+from .coordinator import SCAN_INTERVAL, VrmForecastCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+# States of the manager status sensor (shared by all instances)
+_MANAGER_STATES = (
+    "Initializing",
+    "Running",
+    "Off",
+    "Off - Warning (Grid Lost)",
+    "Off - Warning (Grid Unknown)",
+    "Off - Warning (MQTT connection lost)",
+    "Paused - Warning (Boiler Disconnected)",
+    "Running - Warning (MQTT connection lost)",
+)
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> None:
     """Set up the sensor platform.
@@ -46,8 +55,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
 
     # Add the forecast sensors only if VRM token and installation ID are provided
     if entry.data.get("vrm_token") and entry.data.get("vrm_installation_id"):
-        pv_generation_forecast_today_sensor = PvGenerationForecastTodaySensor(hass, entry)
-        pv_generation_forecast_tomorrow_sensor = PvGenerationForecastTomorrowSensor(hass, entry)
+        # Both sensors are updated from one coordinator (single API request for today's and tomorrow's forecast)
+        coordinator = VrmForecastCoordinator(hass, entry)
+
+        pv_generation_forecast_today_sensor = PvGenerationForecastTodaySensor(hass, entry, coordinator)
+        pv_generation_forecast_tomorrow_sensor = PvGenerationForecastTomorrowSensor(hass, entry, coordinator)
 
         entities.append(pv_generation_forecast_today_sensor)
         entities.append(pv_generation_forecast_tomorrow_sensor)
@@ -55,19 +67,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         hass.data[DOMAIN]["pv_generation_forecast_today_sensor"] = pv_generation_forecast_today_sensor
         hass.data[DOMAIN]["pv_generation_forecast_tomorrow_sensor"] = pv_generation_forecast_tomorrow_sensor
 
-        # Plan to update the forecast sensors one minute after midnight
-        hass.data[DOMAIN]["pv_forecast_today_cancel"] = async_track_time_change(
-            hass, pv_generation_forecast_today_sensor.async_update, hour=0, minute=1, second=0
-        )
-        hass.data[DOMAIN]["pv_forecast_tomorrow_cancel"] = async_track_time_change(
-            hass, pv_generation_forecast_tomorrow_sensor.async_update, hour=0, minute=1, second=0
+        # Plan to update the forecast one minute after midnight
+        async def _async_midnight_refresh(now) -> None:
+            await coordinator.async_request_refresh()
+
+        hass.data[DOMAIN]["pv_forecast_cancel"] = async_track_time_change(
+            hass, _async_midnight_refresh, hour=0, minute=1, second=0
         )
 
     # Add the sensors to the hass instance
     async_add_entities(entities)
 
 
-class ManagerStatusSensor(SensorEntity, RestoreEntity):
+class ManagerStatusSensor(SensorEntity):
     """Representation of a Manager Status sensor entity.
 
     The sensor shows the current status of the manager.
@@ -83,247 +95,105 @@ class ManagerStatusSensor(SensorEntity, RestoreEntity):
     - Running - Warning (MQTT connection lost) -- Manager is running but with lost MQTT connection (It will stop running if mqtt connection is not restored in 30 seconds)
     """
 
+    _attr_should_poll = False  # State is pushed on change
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the sensor with default values."""
         self._hass = hass
         self._entry = entry
         self._attr_unique_id = "pvwhc_manager_status_sensor"
-        self.device_class = SensorDeviceClass.ENUM
-        self.native_value = "Off"
-        self.options = [
-            "Initializing",
-            "Running",
-            "Off",
-            "Off - Warning (Grid Lost)",
-            "Off - Warning (Grid Unknown)",
-            "Off - Warning (MQTT connection lost)",
-            "Paused - Warning (Boiler Disconnected)",
-            "Running - Warning (MQTT connection lost)",
-        ]
-
-    async def async_added_to_hass(self) -> None:
-        """Run when entity about to be added to hass."""
-        pass
-
-    @property
-    def name(self) -> str:
-        """Return the name of the entity."""
-        return "Manager Status"
-
-    @property
-    def state(self) -> str | None:
-        """Return the state of the entity."""
-        return self.native_value
+        self._attr_name = "Manager Status"
+        self._attr_device_class = SensorDeviceClass.ENUM
+        self._attr_native_value = "Off"
+        self._attr_options = _MANAGER_STATES
 
     def set_state(self, state: str) -> None:
         """Set the state of the sensor."""
-        self.native_value = state
+        self._attr_native_value = state
         self.async_write_ha_state()
 
 
-class PvGenerationForecastTomorrowSensor(SensorEntity, RestoreEntity):
+class PvGenerationForecastSensor(CoordinatorEntity[VrmForecastCoordinator], SensorEntity, RestoreEntity):
     """Representation of a PV Generation Forecast sensor entity.
 
-    The sensor shows tomorrow's expected PV generation in Watt-hours.
+    The sensor shows the expected PV generation of the day (forecast key) in Watt-hours.
     Only if VRM token and installation ID are provided.
-    Sensor is updated every hour.
-
-    Source:
-            https://vrm-api-docs.victronenergy.com/#/ (Missing forecast type)
-            https://flows.nodered.org/node/victron-vrm-api
+    Sensor is updated every hour from the shared forecast coordinator (one API request for both days).
     """
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+    _forecast_key = ""
+    _attr_device_class = SensorDeviceClass.ENERGY  # Forecast is in Wh (energy), not power
+    _attr_native_unit_of_measurement = "Wh"
+    _attr_suggested_display_precision = 0
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, coordinator: VrmForecastCoordinator) -> None:
         """Initialize the sensor with default values."""
+        super().__init__(coordinator)
         self._hass = hass
         self._entry = entry
-        self._attr_unique_id = "pvwhc_pv_generation_forecast_tomorrow_sensor"
-        self.device_class = SensorDeviceClass.POWER
-        self.native_value = 0
-        self.suggested_display_precision = 0
-        self.native_unit_of_measurement = "Wh"
+        self._attr_unique_id = f"pvwhc_pv_generation_forecast_{self._forecast_key}_sensor"
+        self._attr_native_value = 0
+        self._fetched_at = None  # When the forecast was last fetched (timestamp), restored after restart
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass."""
-
-        # Get the last state of the sensor
-        ret = await self.async_get_last_state()
-        if ret:
-            self.native_value = int(ret.state)
-
-        # Update sensor if the value is 0, None or last update was more than 30 minutes ago
-        if self.native_value == 0 or ret is None or (datetime.now().timestamp() - ret.last_updated_timestamp) > 1800:
-            await self.async_update()
+        await super().async_added_to_hass()
+
+        # Use the fetched forecast, otherwise the last state of the sensor
+        if self.coordinator.data is not None:
+            self._attr_native_value = self.coordinator.data[self._forecast_key]
+            self._fetched_at = self.coordinator.fetched_at
+        else:
+            ret = await self.async_get_last_state()
+            if ret:
+                with contextlib.suppress(ValueError):
+                    self._attr_native_value = int(ret.state)
+                self._fetched_at = ret.attributes.get("fetched_at")
+
+            # Fetch the forecast in the background if it was not fetched today or it is older than the update interval,
+            # otherwise the next scheduled update is used (refresh requests of both sensors are debounced into one)
+            fetched_at = self._fetched_at or 0
+            if (
+                fetched_at < dt_util.start_of_local_day().timestamp()
+                or time_now() - fetched_at > SCAN_INTERVAL.total_seconds()
+            ):
+                self.hass.async_create_task(self.coordinator.async_request_refresh())
 
         self.async_write_ha_state()
 
-    @property
-    def name(self) -> str:
-        """Return the name of the entity."""
-        return "PV Tomorrow's Generation Forecast"
-
-    @property
-    def state(self) -> int | None:
-        """Return the state of the entity."""
-        return self.native_value
-
-    @property
-    def should_poll(self) -> bool:
-        """Return the polling requirement of the entity."""
-        return True
-
-    def _calculate_time_range(self) -> tuple[float, float]:
-        """Calculate the time range for the forecast.
-
-        Function calculates the start and end parameters for the forecast API call.
-        Converts the current time to tomorrow's start time (i.e. 00:00) and
-        tomorrow's end time (i.e. 23:59) and returns these values as a timestamps.
-
-        Source: https://docs.python.org/3/library/datetime.html
-
-        Returns:
-            tuple[float, float]: Start and end times as timestamps
-
-        """
-
-        # Get the current datetime
-        cest_tz = ZoneInfo("Europe/Bratislava")
-        now = datetime.now(cest_tz)
-
-        # Calculate tomorrow's start and end time
-        start_time = now.replace(hour=0, minute=0, second=0) + timedelta(days=1)
-        end_time = now.replace(hour=23, minute=59, second=59) + timedelta(days=1)
-
-        # Return the start and end times as timestamps
-        return start_time.timestamp(), end_time.timestamp()
-
     @callback
-    async def async_update(self, now=None):
-        """Update the Forecast sensor.
-
-        Function fetches the forecast data from the VRM API and updates the sensor state.
-
-        Source:
-            https://developers.home-assistant.io/docs/integration_fetching_data
-        """
-
-        installation_id = self._entry.data.get("vrm_installation_id")
-        token = self._entry.data.get("vrm_token")
-        start, end = self._calculate_time_range()
-        url = f"https://vrmapi.victronenergy.com/v2/installations/{installation_id}/stats?type=forecast&start={start}&end={end}&interval=days"
-
-        _LOGGER.debug("Updating tomorrow's PV Generation Forecast Sensor")
+    def _handle_coordinator_update(self) -> None:
+        """Update the sensor state from the fetched forecast."""
 
-        try:
-            with async_timeout.timeout(10):
-                session = async_get_clientsession(self.hass)
-                response = await session.get(url, headers={"x-authorization": f"Token {token}"})
-                data = await response.json()
-                self.native_value = int(data["totals"]["solar_yield_forecast"])
-                self.async_write_ha_state()
-        except Exception as error:
-            raise UpdateFailed(error) from error
-
-
-class PvGenerationForecastTodaySensor(SensorEntity, RestoreEntity):
-    """Representation of a PV Generation Forecast sensor entity.
-
-    The sensor shows today's expected PV generation in Watt-hours.
-    Only if VRM token and installation ID are provided.
-    Sensor is updated every hour.
-
-    Source:
-            https://vrm-api-docs.victronenergy.com/#/ (Missing forecast type)
-            https://flows.nodered.org/node/victron-vrm-api
-    """
-
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
-        """Initialize the sensor with default values."""
-        self.hass = hass
-        self.entry = entry
-        self._attr_unique_id = "pvwhc_pv_generation_forecast_today_sensor"
-        self.device_class = SensorDeviceClass.POWER
-        self.native_value = 0
-        self.suggested_display_precision = 0
-        self.native_unit_of_measurement = "Wh"
-
-    async def async_added_to_hass(self) -> None:
-        """Run when entity about to be added to hass."""
-
-        # Get the last state of the sensor
-        ret = await self.async_get_last_state()
-        if ret:
-            self.native_value = int(ret.state)
-
-        # Update sensor if the value is 0, None or last update was more than 30 minutes ago
-        if self.native_value == 0 or ret is None or (datetime.now().timestamp() - ret.last_updated_timestamp) > 1800:
-            await self.async_update()
+        # Fetch failed without any forecast (listeners are notified about the failure), keep the restored value
+        if self.coordinator.data is None:
+            return
 
+        self._attr_native_value = self.coordinator.data[self._forecast_key]
+        self._fetched_at = self.coordinator.fetched_at or self._fetched_at
         self.async_write_ha_state()
 
     @property
-    def name(self) -> str:
-        """Return the name of the entity."""
-        return "PV Today's Generation Forecast"
-
-    @property
-    def state(self) -> int | None:
-        """Return the state of the entity."""
-        return self.native_value
-
-    @property
-    def should_poll(self) -> bool:
-        """Return the polling requirement of the entity."""
-        return True
+    def extra_state_attributes(self) -> dict:
+        """Return the time of the last fetch, so the forecast is not fetched again right after restart."""
+        return {"fetched_at": self._fetched_at}
 
-    def _calculate_time_range(self) -> tuple[float, float]:
-        """Calculate the time range for the forecast.
 
-        Function calculates the start and end parameters for the forecast API call.
-        Converts the current time to today's start time (i.e. 00:00) and
-        today's end time (i.e. 23:59) and returns these values as timestamps.
-
-        Source: https://docs.python.org/3/library/datetime.html
+class PvGenerationForecastTomorrowSensor(PvGenerationForecastSensor):
+    """Representation of a PV Generation Forecast sensor entity.
 
-        Returns:
-            tuple[float, float]: Start and end times as timestamps
+    The sensor shows tomorrow's expected PV generation in Watt-hours.
+    """
 
-        """
+    _forecast_key = "tomorrow"
+    _attr_name = "PV Tomorrow's Generation Forecast"
 
-        # Get the current datetime
-        cest_tz = ZoneInfo("Europe/Bratislava")
-        now = datetime.now(cest_tz)
 
-        # Calculate today's start and end time
-        start_time = now.replace(hour=0, minute=0, second=0)
-        end_time = now.replace(hour=23, minute=59, second=59)
+class PvGenerationForecastTodaySensor(PvGenerationForecastSensor):
+    """Representation of a PV Generation Forecast sensor entity.
 
-        # Return the start and end times as timestamps
-        return start_time.timestamp(), end_time.timestamp()
+    The sensor shows today's expected PV generation in Watt-hours.
+    """
 
-    @callback
-    async def async_update(self, now=None):
-        """Update the Forecast sensor.
-
-        Function fetches the forecast data from the VRM API and updates the sensor state.
-
-        Source:
-            https://developers.home-assistant.io/docs/integration_fetching_data
-        """
-
-        installation_id = self.entry.data.get("vrm_installation_id")
-        token = self.entry.data.get("vrm_token")
-        start, end = self._calculate_time_range()
-        url = f"https://vrmapi.victronenergy.com/v2/installations/{installation_id}/stats?type=forecast&start={start}&end={end}&interval=days"
-
-        _LOGGER.debug("Updating today's PV Generation Forecast Sensor")
-
-        try:
-            with async_timeout.timeout(10):
-                session = async_get_clientsession(self.hass)
-                response = await session.get(url, headers={"x-authorization": f"Token {token}"})
-                data = await response.json()
-                self.native_value = int(data["totals"]["solar_yield_forecast"])
-                self.async_write_ha_state()
-        except Exception as error:
-            raise UpdateFailed(error) from error
+    _forecast_key = "today"
+    _attr_name = "PV Today's Generation Forecast"
@@ -5,15 +5,18 @@ This platform creates a switch entity:
 
 Source: https://developers.home-assistant.io/docs/core/entity/switch
 """
-import contextlib
+import logging
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.restore_state import RestoreEntity
 
 from .const import DOMAIN
 
+_LOGGER = logging.getLogger(__name__)
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Set up the switch platform.
@@ -37,12 +40,20 @@ class NightHeatingSwitch(SwitchEntity, RestoreEntity):
     The switch is used to enable/disable night pre-heating.
     """
 
+    _attr_should_poll = False
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the switch entity with default values."""
         self._hass = hass
         self._entry = entry
         self._attr_unique_id = "pvwhc_night_heating_switch"
-        self._state = False
+        self._attr_name = "Night pre-heating"
+        self._attr_is_on = False
+
+        # Rapid toggles write the state at most once per 250 ms (the first one right away, the last one after cooldown)
+        self._write_debouncer = Debouncer(
+            hass, _LOGGER, cooldown=0.25, immediate=True, function=self.async_write_ha_state
+        )
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass."""
@@ -52,44 +63,39 @@ class NightHeatingSwitch(SwitchEntity, RestoreEntity):
         if ret:
             await self._toggle_state(ret.state == "on")
 
-    @property
-    def name(self) -> str:
-        """Return the name of the entity."""
-        return "Night pre-heating"
-
-    @property
-    def is_on(self) -> bool:
-        """Return the state of the switch."""
-        return bool(self._state)
-
-    @callback
     async def _toggle_state(self, value) -> None:
         """Toggle the switch state."""
-        self._state = value
-        manager_status = self.hass.data[DOMAIN]["manager_status_sensor"].state
+        self._attr_is_on = bool(value)
+        domain_data = self.hass.data[DOMAIN]
+        manager_status = domain_data["manager_status_sensor"].native_value
 
         # Cancel night pre-heating
         if not value:
             if manager_status != "Initializing":
-                with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-                    self.hass.data[DOMAIN]["night_heating_event"]()  # Cancel night heating
-                with contextlib.suppress(KeyError), contextlib.suppress(TypeError):
-                    self.hass.data[DOMAIN]["night_heating_calc_event"]()  # Cancel night heating calculation
+                # Cancel night heating and night heating calculation
+                for key in ("night_heating_event", "night_heating_calc_event"):
+                    cancel = domain_data.pop(key, None)
+                    if cancel is not None:
+                        cancel()
 
             # Turn off boiler, if it is on by night pre-heating
-            if self.hass.data[DOMAIN]["night_preheating"]:
-                boiler_heating = self._hass.states.get(self._entry.data["boiler_heat"]).state
+            if domain_data["night_preheating"]:
+                boiler_heating = self._hass.states.get(self._entry.data["boiler_heat"])
 
-                if boiler_heating == "on":
-                    self.hass.data[DOMAIN]["manager"]._boiler_power(False)
+                if boiler_heating is not None and boiler_heating.state == "on":
+                    await domain_data["manager"]._boiler_power(False)
 
             # Reset variables
-            self.hass.data[DOMAIN]["night_heating_planned"] = False
-            self.hass.data[DOMAIN]["night_heating_calc_planned"] = False
-            self.hass.data[DOMAIN]["night_heating_canceled"] = False
-            self.hass.data[DOMAIN]["night_preheating"] = False
+            domain_data["night_heating_planned"] = False
+            domain_data["night_heating_calc_planned"] = False
+            domain_data["night_heating_canceled"] = False
+            domain_data["night_preheating"] = False
+
+        await self._write_debouncer.async_call()
 
-        self.async_write_ha_state()
+    async def async_will_remove_from_hass(self) -> None:
+        """Run when entity will be removed from hass."""
+        self._write_debouncer.async_cancel()
 
     async def async_turn_on(self, **kwargs) -> None:
         """Turn the switch on."""
@@ -6,11 +6,12 @@ This platform creates a time entity:
 Source: https://developers.home-assistant.io/docs/core/entity/time
 """
 
-from datetime import datetime
+import contextlib
+from datetime import time
 
 from homeassistant.components.time import TimeEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.restore_state import RestoreEntity
 
 from .const import DOMAIN
@@ -35,12 +36,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
 class MorningTime(TimeEntity, RestoreEntity):
     """Representation of a MorningTime time entity."""
 
+    _attr_should_poll = False
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the time entity with default values."""
         self._hass = hass
         self._entry = entry
         self._attr_unique_id = "pvwhc_morning_time"
-        self.native_value = datetime.time(datetime.strptime("00:00", "%H:%M"))
+        self._attr_name = "Morning Time"
+        self._attr_native_value = time(0, 0)
 
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass."""
@@ -48,24 +52,14 @@ class MorningTime(TimeEntity, RestoreEntity):
         # Get the last state of the time
         ret = await self.async_get_last_state()
         if ret:
-            self.native_value = datetime.time(datetime.strptime(ret.state, "%H:%M:%S"))
+            with contextlib.suppress(ValueError):
+                self._attr_native_value = time.fromisoformat(ret.state)
 
         self.async_write_ha_state()
 
-    @property
-    def name(self) -> str:
-        """Return the name of the entity."""
-        return "Morning Time"
-
-    @property
-    def time(self) -> datetime.time:
-        """Return the state of the entity."""
-        return self.native_value
-
-    @callback
     async def _set_value(self, value) -> None:
         """Set the time."""
-        self.native_value = value
+        self._attr_native_value = value
         self.async_write_ha_state()
 
     async def async_set_value(self, value) -> None: